@@ -13,11 +13,17 @@ from .utils.error_handling import (
     handle_http_exception,
     GameException
 )
+from .utils.passwords import PasswordHasher
+from .utils.save_buffer import SaveBuffer
+from .utils.story_watch import StoryFileWatcher
 
 # Initialize extensions
 jwt = JWTManager()
 bcrypt = Bcrypt()
 migrate = Migrate()
+password_hasher = PasswordHasher()
+save_buffer = SaveBuffer()
+story_watcher = StoryFileWatcher()
 
 def create_app():
     app = Flask(__name__, static_folder='static', static_url_path='')
@@ -31,8 +37,11 @@ def create_app():
     CORS(app, origins=['*'], supports_credentials=True)
     jwt.init_app(app)
     bcrypt.init_app(app)
+    password_hasher.init_app(app, bcrypt)
     db.init_app(app)
     migrate.init_app(app, db)
+    save_buffer.init_app(app)
+    story_watcher.init_app(app)
     
     # JWT identity functions
     @jwt.user_identity_loader
@@ -42,8 +51,14 @@ def create_app():
     @jwt.user_lookup_loader
     def user_lookup_callback(_jwt_header, jwt_data):
         identity = jwt_data["sub"]
-        from .models import Users
-        return Users.query.filter_by(id=int(identity)).one_or_none()
+        # Loads user, character and game state together and caches them for the request
+        from .utils.player import load_current_player
+        return load_current_player(identity).user
+    
+    @jwt.token_in_blocklist_loader
+    def check_if_token_revoked(_jwt_header, jwt_payload):
+        from .utils.token_revocation import is_token_revoked
+        return is_token_revoked(jwt_payload["jti"])
     
     # JWT error handlers
     @jwt.expired_token_loader
@@ -54,6 +69,10 @@ def create_app():
     def invalid_token_callback(error):
         return {"error": "Invalid token"}, 401
     
+    @jwt.revoked_token_loader
+    def revoked_token_callback(jwt_header, jwt_payload):
+        return {"error": "Token has been revoked"}, 401
+    
     @jwt.unauthorized_loader
     def missing_token_callback(error):
         return {"error": "Missing token"}, 401
@@ -63,11 +82,17 @@ def create_app():
     from .routes.character_routes import character_bp
     from .routes.game_routes import game_bp
     from .routes.inventory_routes import inventory_bp
+    from .routes.session_routes import session_bp
+    from .routes.save_routes import save_bp
+    from .routes.story_routes import story_bp
     
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(character_bp, url_prefix='/api/characters')
     app.register_blueprint(game_bp, url_prefix='/api/game')
     app.register_blueprint(inventory_bp, url_prefix='/api/inventory')
+    app.register_blueprint(session_bp, url_prefix='/api/session')
+    app.register_blueprint(save_bp, url_prefix='/api/saves')
+    app.register_blueprint(story_bp, url_prefix='/api/story')
     
     # Serve React frontend - improved catch-all route
     @app.route('/', defaults={'path': ''})
@@ -14,6 +14,42 @@ class Config:
     # Production settings
     DEBUG = os.getenv("FLASK_ENV") != "production"
     SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
+
+    # Seconds between checks of the story_version row for a reseed or reload
+    STORY_GRAPH_CHECK_INTERVAL = int(os.getenv("STORY_GRAPH_CHECK_INTERVAL", "5"))
+    # Enables POST /api/story/reload for requests sending this in X-Admin-Token
+    STORY_ADMIN_TOKEN = os.getenv("STORY_ADMIN_TOKEN")
+    # Reload the story when cityStory.json changes (off by default)
+    STORY_FILE_WATCH = os.getenv("STORY_FILE_WATCH", "false").lower() == "true"
+    STORY_FILE_WATCH_INTERVAL = int(os.getenv("STORY_FILE_WATCH_INTERVAL", "5"))
+
+    # Seconds between pulls of new token_blocklist rows, and between purges of expired ones
+    TOKEN_REVOCATION_REFRESH_INTERVAL = int(os.getenv("TOKEN_REVOCATION_REFRESH_INTERVAL", "5"))
+    TOKEN_BLOCKLIST_PURGE_INTERVAL = int(os.getenv("TOKEN_BLOCKLIST_PURGE_INTERVAL", "3600"))
+    # Seconds each pull reaches back before the newest row seen, for revocations committed late
+    TOKEN_REVOCATION_OVERLAP = int(os.getenv("TOKEN_REVOCATION_OVERLAP", "60"))
+
+    # Turns recorded in game_events before a save folds them into the choice_history snapshot
+    GAME_HISTORY_COMPACT_AFTER = int(os.getenv("GAME_HISTORY_COMPACT_AFTER", "50"))
+
+    # Write-behind buffer for soft saves (off by default)
+    SAVE_BUFFER_ENABLED = os.getenv("SAVE_BUFFER_ENABLED", "false").lower() == "true"
+    SAVE_BUFFER_FLUSH_INTERVAL = int(os.getenv("SAVE_BUFFER_FLUSH_INTERVAL", "10"))
+    SAVE_BUFFER_MAX_PENDING = int(os.getenv("SAVE_BUFFER_MAX_PENDING", "500"))
+
+    # Seconds clients may reuse a scene without revalidating it
+    SCENE_CACHE_MAX_AGE = int(os.getenv("SCENE_CACHE_MAX_AGE", "86400"))
+
+    # Named save slots per character
+    SAVE_SLOT_LIMIT = int(os.getenv("SAVE_SLOT_LIMIT", "20"))
+
+    # Password hashing: bcrypt cost, thread pool size and how many callers may wait for it
+    # (keep the queue below gunicorn's threads per worker so a login storm gets 503s)
+    BCRYPT_LOG_ROUNDS = int(os.getenv("BCRYPT_LOG_ROUNDS", "12"))
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    PASSWORD_HASH_QUEUE_SIZE = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", "2"))
+    # Minimum bcrypt cost, for load tests only
+    PASSWORD_HASH_CHEAP_MODE = os.getenv("PASSWORD_HASH_CHEAP_MODE", "false").lower() == "true"
     
     # Handle Render's DATABASE_URL format
     _database_url = os.getenv("DATABASE_URL")
@@ -8,8 +8,12 @@ db = SQLAlchemy()
 from .characters import Character
 from .game_state import GameState
 from .user import Users
+from .item import Item
 from .inventory import Inventory
 from .scenes import Scene
 from .token_blocklist import TokenBlocklist
+from .game_event import GameEvent
+from .save_slot import SaveSlot
+from .story_version import StoryVersion
 
-__all__ = ['db', 'Character', 'GameState', 'Users', 'Inventory', 'Scene', 'TokenBlocklist']
\ No newline at end of file
+__all__ = ['db', 'Character', 'GameState', 'Users', 'Item', 'Inventory', 'Scene', 'TokenBlocklist', 'GameEvent', 'SaveSlot', 'StoryVersion']
\ No newline at end of file
@@ -1,5 +1,36 @@
+from collections.abc import Mapping
 from datetime import datetime
+import random
+from sqlalchemy import update, func
 from . import db
+from ..utils.error_handling import ValidationError
+
+# Stats are clamped to this range
+STAT_MIN, STAT_MAX = 0, 100
+STATS = ('fear', 'sanity')
+# Random variation drawn per stat for every change made with variance
+STAT_VARIANCE = 2
+
+def stat_delta(delta):
+    """
+    A stat delta as {stat: int} with missing stats as 0. Raises ValidationError for
+    values that are not numbers; larger changes than the stat range are capped.
+    """
+    # Story options are read-only mappings, request bodies plain dicts
+    if not isinstance(delta, Mapping):
+        raise ValidationError('Stat changes must be an object', {'delta': delta})
+    span = STAT_MAX - STAT_MIN
+    result = {}
+    for stat in STATS:
+        value = delta.get(stat) or 0
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value != value:
+            raise ValidationError(f'Stat change for {stat} must be a number', {stat: value})
+        result[stat] = int(max(-span, min(span, value)))
+    return result
+
+def with_variance(delta):
+    """Copy of a stat delta with the random ±STAT_VARIANCE added to every stat"""
+    return {stat: value + random.randint(-STAT_VARIANCE, STAT_VARIANCE) for stat, value in stat_delta(delta).items()}
 
 class Character(db.Model):
     __tablename__ = 'characters'
@@ -10,10 +41,43 @@ class Character(db.Model):
     fear = db.Column(db.Integer, default=0)
     sanity = db.Column(db.Integer, default=100)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    # Bumped on every inventory change, used as the inventory ETag
+    inventory_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     # Relationship to Users table
     user = db.relationship('Users', backref=db.backref('characters', lazy=True))
 
+    @classmethod
+    def apply_stat_deltas(cls, character_id, deltas):
+        """
+        Apply one or more stat deltas in a single atomic UPDATE ... RETURNING.
+        Each delta is clamped to [STAT_MIN, STAT_MAX] in order, exactly as if they
+        were applied one by one. Returns the new (fear, sanity), or None if the
+        character does not exist. Raises ValidationError for malformed deltas.
+        """
+        deltas = [stat_delta(delta) for delta in deltas]
+        values = {}
+        for stat in STATS:
+            expr = func.coalesce(getattr(cls, stat), 0)
+            for delta in deltas:
+                expr = func.least(STAT_MAX, func.greatest(STAT_MIN, expr + delta[stat]))
+            values[stat] = expr
+        stmt = update(cls) \
+            .where(cls.id == character_id) \
+            .values(**values) \
+            .returning(cls.fear, cls.sanity) \
+            .execution_options(synchronize_session='fetch')
+        row = db.session.execute(stmt).one_or_none()
+        return tuple(row) if row else None
+
+    @classmethod
+    def bump_inventory_version(cls, character_id):
+        stmt = update(cls) \
+            .where(cls.id == character_id) \
+            .values(inventory_version=cls.inventory_version + 1) \
+            .execution_options(synchronize_session='fetch')
+        db.session.execute(stmt)
+
     def to_dict(self):
         return {
             'id': self.id,
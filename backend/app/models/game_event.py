@@ -0,0 +1,31 @@
+from datetime import datetime
+from . import db
+
+class GameEvent(db.Model):
+    """One row per turn, appended instead of rewriting GameState.choice_history"""
+    __tablename__ = 'game_events'
+    __table_args__ = (
+        db.UniqueConstraint('character_id', 'seq', name='uq_game_events_character_seq'),
+    )
+
+    id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    character_id = db.Column(db.BigInteger, db.ForeignKey('characters.id'), nullable=False)
+    seq = db.Column(db.Integer, nullable=False)
+    stage = db.Column(db.Text, nullable=False)
+    choice_index = db.Column(db.Integer, nullable=True)  # NULL for item-triggered moves
+    next_stage = db.Column(db.Text, nullable=False)
+    stat_deltas = db.Column(db.JSON, nullable=True)
+    reward = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def to_dict(self):
+        """Shape of a choice_history entry"""
+        return {
+            'seq': self.seq,
+            'stage': self.stage,
+            'choice_index': self.choice_index,
+            'next': self.next_stage,
+            'stat_changes': self.stat_deltas,
+            'reward': self.reward,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
@@ -1,30 +1,218 @@
 from datetime import datetime
-import json
+import random
+from sqlalchemy import func, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import deferred
+from sqlalchemy.orm.attributes import set_committed_value
 from . import db
+from .game_event import GameEvent
+from ..utils.story_graph import get_story_graph
+from ..utils.snapshot_codec import SnapshotJSON
+
+# Stage name used for a game that has not been assigned a starting scene yet
+START_STAGE = 'start'
+# One of these is picked at random when a game leaves the 'start' placeholder
+START_SCENES = ('start_subway', 'start_city', 'start_depths')
+
+def stage_to_scene_id(stage):
+    """Scene primary key for a stage name; None for the 'start' placeholder"""
+    if not stage or stage == START_STAGE:
+        return None
+    node = get_story_graph().get(stage)
+    if not node:
+        raise ValueError(f'Unknown stage: {stage}')
+    if node.id is None:
+        # A graph loaded from cityStory.json has no scene rows to point at
+        raise ValueError('Scenes table is empty, run seed_scenes.py first')
+    return node.id
+
+def scene_id_to_stage(scene_id):
+    """Stage name for a scene primary key; the 'start' placeholder for NULL or a retired scene"""
+    node = get_story_graph().get_by_id(scene_id)
+    return node.stage if node else START_STAGE
 
 class GameState(db.Model):
     __tablename__ = 'game_state'  # Fixed to match actual table name
     
     id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
-    character_id = db.Column(db.BigInteger, db.ForeignKey('characters.id'), nullable=False)
-    current_stage = db.Column(db.Text, nullable=True)  # Fixed to match database
-    scene_id = db.Column(db.Text, nullable=True)  # Fixed to match database
-    choice_history = db.Column(db.JSON, nullable=True)  # Fixed to match database
-    current_stats = db.Column(db.JSON, nullable=True)  # Fixed to match database
-    inventory_snapshot = db.Column(db.JSON, nullable=True)  # Fixed to match database
-    last_updated = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)  # Fixed to match database
+    character_id = db.Column(db.BigInteger, db.ForeignKey('characters.id'), nullable=False, unique=True)
+    # Current scene by primary key; NULL means the game is at the 'start' placeholder
+    scene_id = db.Column(db.BigInteger, db.ForeignKey('scenes.id', ondelete='SET NULL'), nullable=True)
+    # Snapshot of the history up to snapshot_seq; later turns live in game_events
+    # The snapshot columns are compact-encoded and only fetched when first accessed
+    choice_history = deferred(db.Column(SnapshotJSON, nullable=True), group='snapshot')
+    snapshot_seq = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    last_event_seq = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    current_stats = deferred(db.Column(SnapshotJSON, nullable=True), group='snapshot')
+    inventory_snapshot = deferred(db.Column(SnapshotJSON, nullable=True), group='snapshot')
+    last_updated = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)  # Fixed to match database
+    # Set when the game reached an ending. The row stays as a tombstone so a
+    # buffered save made before the ending cannot re-insert it; the next save clears it
+    ended_at = db.Column(db.DateTime, nullable=True)
 
     # Relationship to Character table
     character = db.relationship('Character', backref=db.backref('game_states', lazy=True))
 
-    def to_dict(self):
+    @property
+    def current_stage(self):
+        """Stage name derived from scene_id through the in-process story graph"""
+        return scene_id_to_stage(self.scene_id)
+
+    @current_stage.setter
+    def current_stage(self, stage):
+        self.scene_id = stage_to_scene_id(stage)
+
+    @staticmethod
+    def save_row(character_id, current_stage, current_stats, inventory_snapshot):
+        """Column values for an upsert; resolves the stage to its scene id"""
         return {
+            'character_id': character_id,
+            'scene_id': stage_to_scene_id(current_stage),
+            'choice_history': [],
+            'current_stats': current_stats,
+            'inventory_snapshot': inventory_snapshot,
+            'last_updated': datetime.utcnow(),
+            'ended_at': None
+        }
+
+    @classmethod
+    def upsert(cls, character_id, current_stage, current_stats, inventory_snapshot):
+        """Create or overwrite the character's save with one INSERT ... ON CONFLICT DO UPDATE"""
+        cls.upsert_many([cls.save_row(character_id, current_stage, current_stats, inventory_snapshot)])
+
+    @classmethod
+    def upsert_many(cls, rows):
+        """Upsert several characters' saves (rows from save_row) in one statement"""
+        if not rows:
+            return
+        stmt = pg_insert(cls.__table__).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[cls.__table__.c.character_id],
+            set_={
+                'scene_id': stmt.excluded.scene_id,
+                'current_stats': stmt.excluded.current_stats,
+                'inventory_snapshot': stmt.excluded.inventory_snapshot,
+                'last_updated': stmt.excluded.last_updated,
+                'ended_at': stmt.excluded.ended_at
+            },
+            # A buffered save must not overwrite progress recorded after it was made
+            where=cls.__table__.c.last_updated <= stmt.excluded.last_updated
+        )
+        db.session.execute(stmt)
+
+    def end_game(self):
+        """
+        Reset the save for a finished or restarted game and mark it ended instead
+        of deleting the row. The next save or assign_start_scene clears the mark.
+        """
+        self.clear_history()
+        self.current_stage = START_STAGE
+        self.current_stats = {'fear': 0, 'sanity': 100}
+        self.inventory_snapshot = []
+        self.ended_at = datetime.utcnow()
+        self.last_updated = self.ended_at
+
+    def lock(self):
+        """Take a row lock for the rest of the transaction and reload the row's current values"""
+        GameState.query.filter_by(id=self.id).with_for_update().populate_existing().one()
+        return self
+
+    def assign_start_scene(self):
+        """Move a game at the 'start' placeholder to a random starting scene. Returns True if it moved."""
+        if self.current_stage != START_STAGE:
+            return False
+        self.current_stage = random.choice(START_SCENES)
+        # A new playthrough begins, so /load finds it again before its first save
+        self.ended_at = None
+        return True
+
+    def append_event(self, stage, next_stage, choice_index=None, stat_deltas=None, reward=None):
+        """Record one turn as a game_events row instead of rewriting choice_history"""
+        # Take the next seq in the database so two concurrent turns never share one
+        table = GameState.__table__
+        seq = db.session.execute(
+            update(table)
+            .where(table.c.id == self.id)
+            .values(last_event_seq=func.coalesce(table.c.last_event_seq, 0) + 1)
+            .returning(table.c.last_event_seq)
+        ).scalar_one()
+        set_committed_value(self, 'last_event_seq', seq)
+        event = GameEvent(
+            character_id=self.character_id,
+            seq=seq,
+            stage=stage,
+            choice_index=choice_index,
+            next_stage=next_stage,
+            stat_deltas=stat_deltas or None,
+            reward=reward
+        )
+        db.session.add(event)
+        return event
+
+    def history_tail(self, after_seq=None, limit=None):
+        """Events newer than after_seq (the snapshot by default), oldest first"""
+        if after_seq is None:
+            after_seq = self.snapshot_seq or 0
+        query = GameEvent.query.filter(
+            GameEvent.character_id == self.character_id,
+            GameEvent.seq > after_seq
+        ).order_by(GameEvent.seq)
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+
+    def get_choice_history(self):
+        """Full history: the JSON snapshot plus the events appended since"""
+        history = list(self.choice_history or [])
+        if (self.last_event_seq or 0) > (self.snapshot_seq or 0):
+            history.extend(event.to_dict() for event in self.history_tail())
+        return history
+
+    def history_page(self, after_seq=0, limit=50):
+        """Up to limit history entries with seq > after_seq, from the snapshot and then the event log"""
+        snapshot_seq = self.snapshot_seq or 0
+        entries = []
+        if after_seq < snapshot_seq:
+            entries = [
+                entry for entry in self.choice_history or []
+                if 'seq' in entry and after_seq < entry['seq'] <= snapshot_seq
+            ][:limit]
+        if len(entries) < limit:
+            tail = self.history_tail(after_seq=max(after_seq, snapshot_seq), limit=limit - len(entries))
+            entries.extend(event.to_dict() for event in tail)
+        return entries
+
+    def compact_history(self):
+        """Fold the event tail into the snapshot and delete the folded events"""
+        upto = self.last_event_seq or 0
+        if upto > (self.snapshot_seq or 0):
+            # Stop at the seq we loaded; a turn appended meanwhile stays in the tail
+            tail = [event for event in self.history_tail() if event.seq <= upto]
+            self.choice_history = list(self.choice_history or []) + [event.to_dict() for event in tail]
+            self.snapshot_seq = upto
+            GameEvent.query.filter(
+                GameEvent.character_id == self.character_id,
+                GameEvent.seq <= upto
+            ).delete(synchronize_session=False)
+
+    def clear_history(self):
+        """Drop the snapshot and every event, e.g. when the game is reset"""
+        GameEvent.query.filter_by(character_id=self.character_id).delete()
+        self.choice_history = []
+        self.snapshot_seq = 0
+        self.last_event_seq = 0
+
+    def to_dict(self, include_history=True):
+        data = {
             'id': self.id,
             'character_id': self.character_id,
             'current_stage': self.current_stage,
             'scene_id': self.scene_id,
-            'choice_history': self.choice_history,
+            'last_event_seq': self.last_event_seq or 0,
             'current_stats': self.current_stats,
             'inventory_snapshot': self.inventory_snapshot,
             'last_updated': self.last_updated.isoformat() if self.last_updated else None
-        }
\ No newline at end of file
+        }
+        if include_history:
+            data['choice_history'] = self.get_choice_history()
+        return data
@@ -1,25 +1,102 @@
 from datetime import datetime
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from . import db
+from .item import Item
+from .characters import Character
 
 class Inventory(db.Model):
     __tablename__ = 'inventory'  # Fixed to match actual table name
+    # One stack per item, used or not. Also serves every (character, used, item) lookup.
+    __table_args__ = (
+        db.UniqueConstraint('character_id', 'used', 'item_id', name='uq_inventory_character_used_item'),
+    )
     
     id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
     character_id = db.Column(db.BigInteger, db.ForeignKey('characters.id'), nullable=False)
-    item_name = db.Column(db.Text, nullable=False)  # Fixed to match database
-    description = db.Column(db.Text, nullable=True)  # Fixed to match database
+    item_id = db.Column(db.BigInteger, db.ForeignKey('items.id'), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False, default=1, server_default='1')
     used = db.Column(db.Boolean, nullable=False)  # Fixed to match database
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
     # Relationship to Character table
     character = db.relationship('Character', backref=db.backref('inventory', lazy=True))
+    # Catalog entry, loaded with the stack so names never need a second query
+    item = db.relationship('Item', lazy='joined')
+
+    @property
+    def item_name(self):
+        return self.item.name if self.item else None
+
+    @property
+    def description(self):
+        return self.item.description if self.item else None
+
+    @classmethod
+    def add(cls, character_id, item_id, quantity=1, used=False):
+        """Add to the character's stack of an item in one statement. Returns the stack."""
+        # The upsert bypasses the unit of work, so pending stack changes go first
+        db.session.flush()
+        stmt = pg_insert(cls.__table__).values(
+            character_id=character_id,
+            item_id=item_id,
+            quantity=quantity,
+            used=used,
+            created_at=datetime.utcnow()
+        )
+        stmt = stmt.on_conflict_do_update(
+            constraint='uq_inventory_character_used_item',
+            set_={'quantity': cls.__table__.c.quantity + stmt.excluded.quantity}
+        ).returning(cls.__table__.c.id)
+        stack_id = db.session.execute(stmt).scalar_one()
+        Character.bump_inventory_version(character_id)
+        stack = db.session.get(cls, stack_id)
+        db.session.refresh(stack)
+        return stack
+
+    @classmethod
+    def add_by_name(cls, character_id, item_name, description=None, quantity=1):
+        return cls.add(character_id, Item.ensure_one(item_name, description), quantity)
+
+    @classmethod
+    def clear(cls, character_id):
+        """Delete all of a character's items"""
+        cls.query.filter_by(character_id=character_id).delete()
+        Character.bump_inventory_version(character_id)
+
+    @classmethod
+    def unused(cls, character_id):
+        return cls.query.filter_by(character_id=character_id, used=False).all()
+
+    def consume(self, quantity=1):
+        """
+        Use items from an unused stack: they move to the used stack and the
+        stack is deleted once empty. Returns the used stack.
+        """
+        if self.used or quantity > self.quantity:
+            raise ValueError('Not enough unused items in this stack')
+        used_stack = Inventory.add(self.character_id, self.item_id, quantity, used=True)
+        self.quantity -= quantity
+        if self.quantity == 0:
+            db.session.delete(self)
+        return used_stack
+
+    def remove(self, quantity=1):
+        """Drop items from this stack, deleting it once empty"""
+        if quantity > self.quantity:
+            raise ValueError('Not enough items in this stack')
+        self.quantity -= quantity
+        if self.quantity == 0:
+            db.session.delete(self)
+        Character.bump_inventory_version(self.character_id)
 
     def to_dict(self):
         return {
             'id': self.id,
             'character_id': self.character_id,
+            'item_id': self.item_id,
             'item_name': self.item_name,
             'description': self.description,
+            'quantity': self.quantity,
             'used': self.used,
             'created_at': self.created_at.isoformat() if self.created_at else None
-        }
\ No newline at end of file
+        }
@@ -0,0 +1,41 @@
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from . import db
+
+class Item(db.Model):
+    __tablename__ = 'items'
+
+    id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    name = db.Column(db.Text, nullable=False, unique=True, index=True)
+    description = db.Column(db.Text, nullable=True)
+
+    @classmethod
+    def ensure(cls, names, description=None):
+        """
+        Catalog ids for item names, adding the missing names in one statement.
+        A description fills in items that have none yet. Returns {name: id}.
+        """
+        names = {name for name in names if name}
+        if not names:
+            return {}
+        stmt = pg_insert(cls.__table__).values([
+            {'name': name, 'description': description} for name in sorted(names)
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['name'],
+            set_={'description': func.coalesce(cls.__table__.c.description, stmt.excluded.description)}
+        )
+        db.session.execute(stmt)
+        rows = db.session.query(cls.name, cls.id).filter(cls.name.in_(names))
+        return {name: item_id for name, item_id in rows}
+
+    @classmethod
+    def ensure_one(cls, name, description=None):
+        return cls.ensure([name], description)[name]
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'description': self.description
+        }
@@ -0,0 +1,68 @@
+from datetime import datetime
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import deferred
+from . import db
+from ..utils.snapshot_codec import SnapshotJSON
+
+class SaveSlot(db.Model):
+    """A named save. Listing reads only the metadata columns; the snapshots are deferred."""
+    __tablename__ = 'save_slots'
+    __table_args__ = (
+        db.UniqueConstraint('character_id', 'name', name='uq_save_slots_character_name'),
+    )
+
+    id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    character_id = db.Column(db.BigInteger, db.ForeignKey('characters.id'), nullable=False)
+    name = db.Column(db.String(64), nullable=False)
+    scene_id = db.Column(db.BigInteger, db.ForeignKey('scenes.id', ondelete='SET NULL'), nullable=True)
+    fear = db.Column(db.Integer, nullable=True)
+    sanity = db.Column(db.Integer, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    choice_history = deferred(db.Column(SnapshotJSON, nullable=True), group='snapshot')
+    inventory_snapshot = deferred(db.Column(SnapshotJSON, nullable=True), group='snapshot')
+
+    @property
+    def current_stage(self):
+        from .game_state import scene_id_to_stage
+        return scene_id_to_stage(self.scene_id)
+
+    @classmethod
+    def upsert(cls, character_id, name, current_stage, current_stats, choice_history, inventory_snapshot):
+        """Create or overwrite a named slot in one statement"""
+        from .game_state import stage_to_scene_id
+        current_stats = current_stats or {}
+        stmt = pg_insert(cls.__table__).values(
+            character_id=character_id,
+            name=name,
+            scene_id=stage_to_scene_id(current_stage),
+            fear=current_stats.get('fear'),
+            sanity=current_stats.get('sanity'),
+            updated_at=datetime.utcnow(),
+            choice_history=choice_history,
+            inventory_snapshot=inventory_snapshot
+        )
+        stmt = stmt.on_conflict_do_update(
+            constraint='uq_save_slots_character_name',
+            set_={
+                'scene_id': stmt.excluded.scene_id,
+                'fear': stmt.excluded.fear,
+                'sanity': stmt.excluded.sanity,
+                'updated_at': stmt.excluded.updated_at,
+                'choice_history': stmt.excluded.choice_history,
+                'inventory_snapshot': stmt.excluded.inventory_snapshot
+            }
+        )
+        db.session.execute(stmt)
+
+    def to_dict(self, include_snapshot=False):
+        data = {
+            'id': self.id,
+            'name': self.name,
+            'current_stage': self.current_stage,
+            'current_stats': {'fear': self.fear, 'sanity': self.sanity},
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+        if include_snapshot:
+            data['choice_history'] = self.choice_history
+            data['inventory_snapshot'] = self.inventory_snapshot
+        return data
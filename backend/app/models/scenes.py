@@ -5,11 +5,16 @@ from . import db
 class Scene(db.Model):
     __tablename__ = 'scenes'
     id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
-    stage = db.Column(db.Text)
+    stage = db.Column(db.Text, unique=True, index=True)
     description = db.Column(db.Text)
     options = db.Column(db.JSON)
     item_triggers = db.Column(db.JSON)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # sha256 of description, options and item_triggers, so reseeding only touches changed scenes
+    content_hash = db.Column(db.String(64), nullable=True)
+    # Set when a reseed drops the stage. The row is kept so saves pointing at it keep
+    # their scene_id and resume there if the stage comes back; the story graph skips it
+    retired_at = db.Column(db.DateTime, nullable=True)
 
     def to_dict(self):
         return {
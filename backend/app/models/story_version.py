@@ -0,0 +1,27 @@
+from datetime import datetime
+from . import db
+
+class StoryVersion(db.Model):
+    """Single row describing the story currently loaded into the scenes table"""
+    __tablename__ = 'story_version'
+
+    # Always 1; there is only ever one row
+    id = db.Column(db.Integer, primary_key=True)
+    # sha256 of the story file that was last seeded
+    source_hash = db.Column(db.String(64), nullable=True)
+    # Incremented every time the scenes change
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    ROW_ID = 1
+
+    @classmethod
+    def current(cls):
+        return db.session.get(cls, cls.ROW_ID)
+
+    def to_dict(self):
+        return {
+            'source_hash': self.source_hash,
+            'version': self.version,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -5,12 +5,15 @@ class TokenBlocklist(db.Model):
     __tablename__ = 'token_blocklist'
     
     id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
-    token = db.Column(db.Text, nullable=False, unique=True)
+    jti = db.Column(db.String(36), nullable=False, unique=True)
+    # When the revoked token would have expired anyway; the row can be purged after this
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
     def to_dict(self):
         return {
             'id': self.id,
-            'token': self.token,
+            'jti': self.jti,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None,
             'created_at': self.created_at.isoformat() if self.created_at else None
-        } 
\ No newline at end of file
+        } 
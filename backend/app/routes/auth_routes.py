@@ -1,10 +1,17 @@
-from flask import Blueprint, request, jsonify
-from flask_bcrypt import Bcrypt
-from ..models import db, Users, Character, GameState, TokenBlocklist
+from flask import Blueprint, request, jsonify, current_app
+from .. import password_hasher, save_buffer
+from ..models import db, Users, Character, GameState
+from ..models.game_state import START_STAGE, scene_id_to_stage
+from ..utils.story_graph import get_story_graph
+from ..utils.player import current_player
+from ..utils.token_revocation import is_token_revoked, revoke_token
+from ..utils.passwords import PasswordHasherBusy
+from datetime import datetime
 import re
-
-bcrypt = Bcrypt()
-from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity
+import time
+from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity, get_jwt, decode_token
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt import ExpiredSignatureError, PyJWTError
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -56,7 +63,7 @@ def register():
         if existing_user:
             return jsonify({'error': 'User already exists'}), 400
         
-        hashed_password = bcrypt.generate_password_hash(password).decode('utf-8')
+        hashed_password = password_hasher.hash(password)
         new_user = Users(email=email, username=username, password_hash=hashed_password)
         db.session.add(new_user)
         db.session.flush()  # Get the user ID without committing yet
@@ -72,7 +79,6 @@ def register():
         initial_game_state = GameState( 
             character_id=default_character.id,
             current_stage='start',
-            scene_id='start',
             choice_history=[],
             current_stats={'fear': 0, 'sanity': 100},
             inventory_snapshot=[]
@@ -82,6 +88,9 @@ def register():
         access_token = create_access_token(identity=new_user.id)
 
         return jsonify({'message': 'User registered successfully', 'access_token': access_token, 'character': default_character.to_dict(), 'game_state': initial_game_state.to_dict()}), 201
+    except PasswordHasherBusy as e:
+        db.session.rollback()
+        return jsonify({'error': e.message}), e.status_code
     except Exception as e:
         return jsonify({'error':'Registration failed', 'details': str(e)}), 500
 
@@ -97,30 +106,30 @@ def login():
         username = data['username'].strip()
         password = data['password']
         
-        print(f"🔍 Login attempt for username: {username}")
-        
         user = Users.query.filter((Users.username == username) | (Users.email == username)).first()
         
         if not user:
-            print(f"❌ User not found for username: {username}")
             return jsonify({'error': 'invalid credentials'}), 401
         
-        print(f"✅ User found: {user.username} (ID: {user.id})")
-        
-        password_check = bcrypt.check_password_hash(user.password_hash, password)
-        print(f"🔍 Password check result: {password_check}")
+        password_check = password_hasher.verify(user.password_hash, password)
         
         if not password_check:
-            print(f"❌ Password check failed for user: {user.username}")
             return jsonify({'error': 'invalid credentials'}), 401
         
-        print(f"✅ Password check passed for user: {user.username}")
+        # Upgrade hashes made with an old work factor while we have the plain password.
+        # The password is already verified, so a busy pool only postpones the upgrade.
+        if password_hasher.needs_rehash(user.password_hash):
+            try:
+                user.password_hash = password_hasher.hash(password)
+                db.session.commit()
+            except PasswordHasherBusy:
+                pass
         access_token = create_access_token(identity=user.id)
-        print(f"✅ JWT token created for user ID: {user.id}")
         
         return jsonify({'message': 'Login successful', 'access_token': access_token}), 200
+    except PasswordHasherBusy as e:
+        return jsonify({'error': e.message}), e.status_code
     except Exception as e:
-        print(f"❌ Login error: {e}")
         return jsonify({'error': 'Login failed', 'details': str(e)}), 500
 
 
@@ -128,45 +137,86 @@ def login():
 @jwt_required()
 def logout():
     try:
-        token = request.headers.get('Authorization').split(' ')[1]
-
-        blacklist_token = TokenBlocklist(token=token)
-        db.session.add(blacklist_token)
-        db.session.commit()
+        token = get_jwt()
+        revoke_token(token['jti'], datetime.utcfromtimestamp(token['exp']))
 
         return jsonify({'message': 'Successfully logged out'}), 200
     except Exception as e:
         return jsonify({'error': 'Logout failed', 'details': str(e)}), 500
 
+# Cheap token check: verifies signature, expiry and revocation without loading
+# the user or any game data, and reports how long the token has left.
+@auth_bp.route('/introspect', methods=['GET'])
+def introspect_token():
+    auth_header = request.headers.get('Authorization', '')
+    if not auth_header.startswith('Bearer '):
+        return jsonify({'active': False, 'error': 'Missing token'}), 401
+
+    token = auth_header.split(' ', 1)[1]
+    try:
+        decoded = decode_token(token)
+    except ExpiredSignatureError:
+        return jsonify({'active': False, 'error': 'Token has expired'}), 401
+    except (PyJWTError, JWTExtendedException):
+        return jsonify({'active': False, 'error': 'Invalid token'}), 401
+
+    if decoded.get('type') != 'access':
+        return jsonify({'active': False, 'error': 'Invalid token'}), 401
+
+    if is_token_revoked(decoded['jti']):
+        return jsonify({'active': False, 'error': 'Token has been revoked'}), 401
+
+    expires_at = decoded.get('exp')
+    return jsonify({
+        'active': True,
+        'sub': decoded.get('sub'),
+        'exp': expires_at,
+        'expires_in': max(0, int(expires_at - time.time())) if expires_at else None
+    }), 200
+
 @auth_bp.route('/save', methods=['POST'])
 @jwt_required()
 def save_game():
     try:
-        user_id = get_jwt_identity()
         data = request.get_json()
-        character = Character.query.filter_by(user_id=user_id).first()
+        _, character, game_state = current_player()
         if not character:
             return jsonify({'error': 'Character not found'}), 404
 
-        # If the current stage is an ending, delete the save if it exists
+        # If the current stage is an ending, end the save if it exists
         current_stage = data.get('current_stage')
-        if current_stage and str(current_stage).startswith('ending'):
-            game_state = GameState.query.filter_by(character_id=character.id).first()
+        if current_stage and get_story_graph().is_ending(current_stage):
+            save_buffer.discard(character.id)
             if game_state:
-                db.session.delete(game_state)
+                game_state.end_game()
                 db.session.commit()
             return jsonify({'message': 'Game ended, save deleted.'}), 200
 
-        # Save or update the game state
-        game_state = GameState.query.filter_by(character_id=character.id).first()
-        if not game_state:
-            game_state = GameState(character_id=character.id)
-            db.session.add(game_state)
-            
-        game_state.current_stage = current_stage
-        game_state.choice_history = data.get('choice_history')
-        game_state.current_stats = data.get('current_stats')
-        game_state.inventory_snapshot = data.get('inventory_snapshot')
+        if current_stage and current_stage != START_STAGE and current_stage not in get_story_graph():
+            return jsonify({'error': f'Unknown stage: {current_stage}'}), 400
+
+        # Soft saves go through the write-behind buffer when it is enabled
+        if save_buffer.enabled and not data.get('hard'):
+            save_buffer.put(GameState.save_row(
+                character.id,
+                current_stage,
+                data.get('current_stats'),
+                data.get('inventory_snapshot')
+            ))
+            return jsonify({'message': 'Game saved successfully.', 'buffered': True}), 200
+        save_buffer.discard(character.id)
+
+        # choice_history is recorded per turn in game_events; only fold a long tail into the snapshot
+        if game_state and (game_state.last_event_seq or 0) - (game_state.snapshot_seq or 0) >= current_app.config.get('GAME_HISTORY_COMPACT_AFTER', 50):
+            game_state.compact_history()
+
+        # Save or update the game state in a single statement
+        GameState.upsert(
+            character.id,
+            current_stage,
+            data.get('current_stats'),
+            data.get('inventory_snapshot')
+        )
         db.session.commit()
         return jsonify({'message': 'Game saved successfully.'}), 200
     except Exception as e:
@@ -177,17 +227,29 @@ def save_game():
 @jwt_required()
 def load_game():
     try:
-        user_id = get_jwt_identity()
-        character = Character.query.filter_by(user_id=user_id).first()
+        _, character, game_state = current_player()
         if not character:
             return jsonify({'error': 'Character not found'}), 404
 
-        game_state = GameState.query.filter_by(character_id=character.id).order_by(GameState.last_updated.desc()).first()
-        if not game_state:
+        # A save still waiting in this worker's buffer is newer than the database row
+        pending = save_buffer.get(character.id)
+        if (not game_state or game_state.ended_at) and not pending:
           return jsonify({'error': 'No saved game found.'}), 404
 
+        include_history = request.args.get('include_history', 'true').lower() != 'false'
+        choice_history = None
+        if include_history:
+            choice_history = game_state.get_choice_history() if game_state else []
+
+        if pending:
+            return jsonify({'current_stage': scene_id_to_stage(pending['scene_id']),
+            'choice_history': choice_history,
+                'current_stats': pending['current_stats'],
+                'inventory_snapshot': pending['inventory_snapshot']
+            }), 200
+
         return jsonify({'current_stage': game_state.current_stage,
-        'choice_history': game_state.choice_history,
+        'choice_history': choice_history,
             'current_stats': game_state.current_stats,
             'inventory_snapshot': game_state.inventory_snapshot
         }), 200
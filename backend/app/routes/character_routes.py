@@ -1,6 +1,9 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from ..models import db, Users, Character, GameState
+from ..models import db, Character, GameState
+from ..models.characters import with_variance
+from ..utils.player import current_player, forget_current_player
+from ..utils.error_handling import ValidationError
 # from datetime import datetime
 
 character_bp = Blueprint('character', __name__)
@@ -10,11 +13,10 @@ character_bp = Blueprint('character', __name__)
 def create_character():
     try:
         user_id = get_jwt_identity()
-        user = Users.query.filter_by(id=user_id).first()
+        user, existing_character, _ = current_player()
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        existing_character = Character.query.filter_by(user_id=user_id).first()
         if existing_character:
             return jsonify({'error': 'Character already exists'}), 400
         
@@ -34,13 +36,13 @@ def create_character():
         initial_game_state = GameState(
             character_id=new_character.id,
             current_stage='start',
-            scene_id='start',
             choice_history=[],
             current_stats={'fear': 0, 'sanity': 100},
             inventory_snapshot=[]
         )
         db.session.add(initial_game_state)
         db.session.commit()
+        forget_current_player()
         return jsonify({'message': 'Character created successfully', 'character': new_character.to_dict(), 'game_state': initial_game_state.to_dict()}), 201
 
     except Exception as e:
@@ -51,18 +53,16 @@ def create_character():
 @jwt_required()
 def get_character():
     try:
-        user_id = get_jwt_identity()
-        user = Users.query.filter_by(id=user_id).first()
+        user, character, game_state = current_player()
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        character = Character.query.filter_by(user_id=user_id).first()
         if not character:
             return jsonify({'error': 'Character not found'}), 404
         
-        game_state = GameState.query.filter_by(character_id=character.id).order_by(GameState.last_updated.desc()).first()
-        
-        return jsonify({'character': character.to_dict(), 'game_state': game_state.to_dict() if game_state else None}), 200
+        # The full choice history is only rebuilt when asked for
+        include_history = request.args.get('include_history', 'false').lower() == 'true'
+        return jsonify({'character': character.to_dict(), 'game_state': game_state.to_dict(include_history) if game_state else None}), 200
     
     except Exception as e:
         return jsonify({'error': 'Failed to get character', 'details': str(e)}), 500
@@ -72,10 +72,14 @@ def get_character():
 @character_bp.route('/update-stats', methods=['POST'])
 @jwt_required()
 def update_character_stats():
-    """Update character stats (health, fear, sanity)"""
+    """
+    Update character stats (health, fear, sanity).
+    Accepts absolute values ({"fear": 10}), one relative change ({"delta": {"fear": 2}})
+    or several applied in order ({"deltas": [...]}). Relative changes run as one atomic
+    UPDATE and get the random variance unless "variance" is false.
+    """
     try:
-        user_id = get_jwt_identity()
-        character = Character.query.filter_by(user_id=user_id).first()
+        character = current_player().character
         if not character:
             return jsonify({'error': 'Character not found'}), 404
         
@@ -83,6 +87,19 @@ def update_character_stats():
         if not data:
             return jsonify({'error': 'No data provided'}), 400
         
+        if 'delta' in data or 'deltas' in data:
+            deltas = data['deltas'] if 'deltas' in data else [data['delta']]
+            if not isinstance(deltas, list) or not all(isinstance(delta, dict) for delta in deltas):
+                return jsonify({'error': 'Deltas must be objects of stat changes'}), 400
+            if data.get('variance', True):
+                deltas = [with_variance(delta) for delta in deltas]
+            Character.apply_stat_deltas(character.id, deltas)
+            db.session.commit()
+            return jsonify({
+                'message': 'Character stats updated successfully',
+                'character': character.to_dict()
+            }), 200
+        
         # Update stats if provided
         if 'fear' in data:
             character.fear = max(0, min(100, data['fear']))  # Clamp between 0-100
@@ -95,6 +112,9 @@ def update_character_stats():
             'message': 'Character stats updated successfully',
             'character': character.to_dict()
         }), 200
+    except ValidationError:
+        db.session.rollback()
+        raise
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Failed to update character stats', 'details': str(e)}), 500
@@ -104,8 +124,7 @@ def update_character_stats():
 def reset_character():
     """Reset character stats to initial values"""
     try:
-        user_id = get_jwt_identity()
-        character = Character.query.filter_by(user_id=user_id).first()
+        _, character, game_state = current_player()
         if not character:
             return jsonify({'error': 'Character not found'}), 404
         
@@ -113,14 +132,9 @@ def reset_character():
         character.fear = 0
         character.sanity = 100
         
-        # Reset game state to start
-        game_state = GameState.query.filter_by(character_id=character.id).first()
+        # Reset game state to start; the old save can no longer be loaded
         if game_state:
-            game_state.current_stage = 'start'
-            game_state.scene_id = 'start'
-            game_state.choice_history = []
-            game_state.current_stats = {'fear': 0, 'sanity': 100}
-            game_state.inventory_snapshot = []
+            game_state.end_game()
         
         db.session.commit()
         
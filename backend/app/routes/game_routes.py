@@ -1,9 +1,13 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from ..models import db, GameState, Character, Scene, Inventory
+from .. import save_buffer
+from ..models import db, Character, Inventory
+from ..models.characters import STATS, with_variance
+from ..models.game_state import scene_id_to_stage
 from ..utils.error_handling import (
     ValidationError,
     NotFoundError,
+    ConflictError,
     DatabaseError,
     safe_database_operation,
     validate_required_fields,
@@ -11,43 +15,83 @@ from ..utils.error_handling import (
     log_api_request,
     log_api_response
 )
-import json
-import random
+from ..utils.story_graph import get_story_graph
+from ..utils.player import current_player
+from ..utils.inventory_checks import option_availability, annotated_scene_bytes
+from ..utils.http_cache import not_modified, with_etag, scene_json, json_with_raw, splice_json
 
-def validate_required_items(option, character_id):
+def include_next():
+    """True when the request opted into one-hop prefetch with ?include=next"""
+    return 'next' in request.args.get('include', '').split(',')
+
+def next_scenes_field(graph, stage):
+    """The cached 'next_scenes' field for a scene, and its hash"""
+    body, body_hash = graph.next_scenes(stage)
+    return {'next_scenes': body}, body_hash
+
+def locked_stage(game_state, claimed_stage):
+    """
+    Lock the player's game state row until the turn commits and return the stage
+    the server has them at. A 'current' from the client that disagrees (a second
+    tab, a retried request) is rejected with a 409 instead of being trusted.
+    """
+    if not game_state:
+        if not claimed_stage:
+            raise NotFoundError('Game state not found')
+        return claimed_stage
+    game_state.lock()
+    # A save still waiting in this worker's buffer is newer than the row
+    pending = save_buffer.get(game_state.character_id)
+    stage = scene_id_to_stage(pending['scene_id']) if pending else game_state.current_stage
+    if claimed_stage is not None and claimed_stage != stage:
+        raise ConflictError(
+            f'Current stage is {stage}, not {claimed_stage}',
+            {'current': stage, 'requested': claimed_stage}
+        )
+    return stage
+
+def resolve_choice(graph, current_stage, choice_index, character_id):
     """
-    Validate if the player has the required items for a choice.
-    Returns (is_valid, missing_items) tuple.
+    Validate a choice against the story graph and the player's inventory.
+    Returns (selected_option, next_node) or raises a GameException.
     """
-    if not option:
-        return True, []
+    current_node = graph.get(current_stage)
+    if not current_node:
+        raise NotFoundError(f'Scene not found for stage: {current_stage}')
+    
+    # Validate choice index
+    options = current_node.options or []
+    if choice_index >= len(options):
+        raise ValidationError(
+            f'Choice index {choice_index} out of range. Available options: {len(options)}',
+            {'choice_index': choice_index, 'available_options': len(options)}
+        )
+    if choice_index < 0:
+        raise ValidationError(f'Choice index {choice_index} is negative')
+    
+    selected_option = options[choice_index]
+    
+    # Validate required items (one query for the whole scene)
+    availability = option_availability(options, character_id)[choice_index]
+    if not availability['available']:
+        missing_items = availability['missing_items']
+        missing_items_str = ', '.join(missing_items)
+        raise ValidationError(
+            f'Missing required items: {missing_items_str}',
+            {'missing_items': missing_items}
+        )
     
-    missing_items = []
+    if 'next' not in selected_option:
+        raise ValidationError(f'Selected option has no next stage')
     
-    # Check for single required item
-    if 'required_item' in option and option['required_item']:
-        required_item = option['required_item']
-        inventory_item = Inventory.query.filter_by(
-            character_id=character_id,
-            item_name=required_item,
-            used=False
-        ).first()
-        if not inventory_item:
-            missing_items.append(required_item)
+    next_stage = selected_option['next']
     
-    # Check for multiple required items
-    if 'required_items' in option and option['required_items']:
-        required_items = option['required_items']
-        for item_name in required_items:
-            inventory_item = Inventory.query.filter_by(
-                character_id=character_id,
-                item_name=item_name,
-                used=False
-            ).first()
-            if not inventory_item:
-                missing_items.append(item_name)
+    # Find next scene
+    next_node = graph.get(next_stage)
+    if not next_node:
+        raise NotFoundError(f'Next scene not found: {next_stage}')
     
-    return len(missing_items) == 0, missing_items
+    return selected_option, next_node
 
 game_bp = Blueprint('game', __name__)
 
@@ -55,35 +99,28 @@ game_bp = Blueprint('game', __name__)
 @jwt_required()
 def get_start_game():
     try:
-       user_id = get_jwt_identity()
-       character = Character.query.filter_by(user_id=user_id).first()
+       _, character, game_state = current_player()
 
        if not character:
         return jsonify({'error': 'Character not found'}), 404
        
-       game_state = GameState.query.filter_by(character_id=character.id).first()
        if not game_state:
          return jsonify({'error': 'Game state not found'}), 404
        
-       # If scene_id is "start", assign a random starting scene
-       if game_state.scene_id == "start":
-           start_scenes = ["start_subway", "start_city", "start_depths"]
-           random_scene = random.choice(start_scenes)
-           game_state.scene_id = random_scene
-           game_state.current_stage = random_scene
+       # If the game is still at "start", assign a random starting scene
+       if game_state.assign_start_scene():
            db.session.commit()
        
-       current_scene = None
-       if game_state.scene_id:
-        current_scene = Scene.query.filter_by(stage=game_state.scene_id).first()
-       inventory_items = Inventory.query.filter_by(character_id=character.id, used=False).all()
+       current_scene = get_story_graph().get_by_id(game_state.scene_id)
+       inventory_items = Inventory.unused(character.id)
+       owned_items = {item.item_name for item in inventory_items}
        response_data = {
             'character': character.to_dict(),
-            'game_state': game_state.to_dict(),
-            'current_scene': current_scene.to_dict() if current_scene else None,
+            'game_state': game_state.to_dict(include_history=False),
             'inventory': [item.to_dict() for item in inventory_items]
         }
-       return jsonify(response_data), 200
+       current_scene_body = annotated_scene_bytes(current_scene, character.id, owned_items) if current_scene else None
+       return json_with_raw(response_data, {'current_scene': current_scene_body})
     except Exception as e:
         return jsonify({'error': 'Failed to get start game', 'details': str(e)}), 500
 
@@ -101,79 +138,44 @@ def make_choice():
         if not data:
             raise ValidationError('No JSON data provided')
         
-        validate_required_fields(data, ['current', 'choice_index'], 'make_choice')
+        validate_required_fields(data, ['choice_index'], 'make_choice')
         validate_field_type(data['choice_index'], int, 'choice_index')
         
-        current_stage = data['current']
         choice_index = data['choice_index']
         
-        # Find current scene
-        current_node = safe_database_operation(
-            lambda: Scene.query.filter_by(stage=current_stage).first(),
-            f"Failed to find scene for stage: {current_stage}"
+        graph = safe_database_operation(
+            get_story_graph,
+            "Failed to load story graph"
         )
         
-        if not current_node:
-            raise NotFoundError(f'Scene not found for stage: {current_stage}')
-        
-        # Validate choice index
-        options = current_node.options or []
-        if choice_index >= len(options):
-            raise ValidationError(
-                f'Choice index {choice_index} out of range. Available options: {len(options)}',
-                {'choice_index': choice_index, 'available_options': len(options)}
-            )
-        if choice_index < 0:
-            raise ValidationError(f'Choice index {choice_index} is negative')
-        
-        selected_option = options[choice_index]
-        
         # Find character
-        character = safe_database_operation(
-            lambda: Character.query.filter_by(user_id=user_id).first(),
+        _, character, game_state = safe_database_operation(
+            current_player,
             "Failed to find character"
         )
         
         if not character:
             raise NotFoundError('Character not found')
         
-        # Validate required items
-        is_valid, missing_items = validate_required_items(selected_option, character.id)
-        if not is_valid:
-            missing_items_str = ', '.join(missing_items)
-            raise ValidationError(
-                f'Missing required items: {missing_items_str}',
-                {'missing_items': missing_items}
-            )
-        
-        if 'next' not in selected_option:
-            raise ValidationError(f'Selected option has no next stage')
-        
-        next_stage = selected_option['next']
-        
-        # Find next scene
-        next_node = safe_database_operation(
-            lambda: Scene.query.filter_by(stage=next_stage).first(),
-            f"Failed to find next scene for stage: {next_stage}"
-        )
-        
-        if not next_node:
-            raise NotFoundError(f'Next scene not found: {next_stage}')
+        current_stage = locked_stage(game_state, data.get('current'))
+        selected_option, next_node = resolve_choice(graph, current_stage, choice_index, character.id)
+        next_stage = next_node.stage
         
         # Update game state
         def update_game_state():
-            game_state = GameState.query.filter_by(character_id=character.id).first()
             if game_state:
-                game_state.scene_id = next_stage
                 game_state.current_stage = next_stage
+                game_state.append_event(current_stage, next_stage, choice_index)
                 db.session.commit()
+                save_buffer.discard(character.id)
         
         safe_database_operation(update_game_state, "Failed to update game state")
         
         log_api_response(200, '/choice', user_id)
-        return jsonify(next_node.to_dict())
+        extra = next_scenes_field(graph, next_stage)[0] if include_next() else None
+        return scene_json(next_node, option_availability(next_node.options, character.id), extra=extra)
         
-    except (ValidationError, NotFoundError, DatabaseError) as e:
+    except (ValidationError, NotFoundError, ConflictError, DatabaseError) as e:
         log_api_response(e.status_code, '/choice', user_id, error=str(e))
         raise
     except Exception as e:
@@ -181,18 +183,144 @@ def make_choice():
         raise DatabaseError(f"Unexpected error in make_choice: {str(e)}")
 
 
+def apply_stat_changes(character, stat_changes):
+    """Apply a choice's stat changes plus the random variance atomically. Returns the applied deltas."""
+    if not stat_changes:
+        return {}
+    old_values = {stat: getattr(character, stat) or 0 for stat in STATS}
+    new_values = Character.apply_stat_deltas(character.id, [with_variance(stat_changes)])
+    if new_values is None:
+        return {}
+    return {stat: new_value - old_values[stat] for stat, new_value in zip(STATS, new_values)}
+
+def reset_progress(character, game_state):
+    """Ending cleanup: clear the inventory, put the character back at the start and end the save"""
+    Inventory.clear(character.id)
+    character.fear = 0
+    character.sanity = 100
+    if game_state:
+        game_state.end_game()
+
+# Applies a whole choice in one transaction: validation, stat changes, reward,
+# choice history and ending cleanup. Replaces the chain of calls the client used to make.
+@game_bp.route('/turn', methods=['POST'])
+@jwt_required()
+def take_turn():
+    user_id = get_jwt_identity()
+    log_api_request('POST', '/turn', user_id)
+    
+    try:
+        data = request.get_json()
+        if not data:
+            raise ValidationError('No JSON data provided')
+        
+        validate_required_fields(data, ['choice_index'], 'take_turn')
+        validate_field_type(data['choice_index'], int, 'choice_index')
+        
+        choice_index = data['choice_index']
+        
+        graph = safe_database_operation(
+            get_story_graph,
+            "Failed to load story graph"
+        )
+        
+        _, character, game_state = safe_database_operation(
+            current_player,
+            "Failed to find character"
+        )
+        if not character:
+            raise NotFoundError('Character not found')
+        
+        current_stage = locked_stage(game_state, data.get('current'))
+        selected_option, next_node = resolve_choice(graph, current_stage, choice_index, character.id)
+        
+        def apply_turn():
+            applied_stats = apply_stat_changes(character, selected_option.get('stat_changes'))
+            
+            added_items = []
+            reward = selected_option.get('reward')
+            if next_node.is_ending:
+                # Endings wipe the inventory, so a reward would be removed right away
+                reset_progress(character, game_state)
+            elif reward:
+                added_items.append(Inventory.add_by_name(character.id, reward, 'Reward from story choice'))
+            
+            if game_state and not next_node.is_ending:
+                game_state.current_stage = next_node.stage
+                game_state.current_stats = {'fear': character.fear, 'sanity': character.sanity}
+                game_state.append_event(current_stage, next_node.stage, choice_index, applied_stats, reward)
+            
+            db.session.flush()
+            result = {
+                'character': character.to_dict(),
+                'stat_changes': applied_stats,
+                'inventory_delta': {
+                    'added': [item.to_dict() for item in added_items],
+                    'reset': next_node.is_ending
+                },
+                'game_ended': next_node.is_ending
+            }
+            scene_body = annotated_scene_bytes(next_node, character.id)
+            if include_next() and not next_node.is_ending:
+                scene_body = splice_json(scene_body, next_scenes_field(graph, next_node.stage)[0])
+            db.session.commit()
+            return result, scene_body
+        
+        try:
+            result, scene_body = safe_database_operation(apply_turn, "Failed to apply turn")
+        except DatabaseError:
+            db.session.rollback()
+            raise
+        # The turn supersedes any save still waiting in the buffer
+        save_buffer.discard(character.id)
+        
+        log_api_response(200, '/turn', user_id)
+        return json_with_raw(result, {'scene': scene_body})
+        
+    except (ValidationError, NotFoundError, ConflictError, DatabaseError) as e:
+        log_api_response(e.status_code, '/turn', user_id, error=str(e))
+        raise
+    except Exception as e:
+        log_api_response(500, '/turn', user_id, error=str(e))
+        raise DatabaseError(f"Unexpected error in take_turn: {str(e)}")
+
+
 # this is the item that the user uses. It will return the next node in the story.
 # I needed to add this because the item is used in the story, so there needs to be a way to trigger the 
 # story progression.
 @game_bp.route('/scene/<stage>', methods=['GET'])
 @jwt_required()
 def get_scene_by_stage(stage):
-    """Get a specific scene by stage name"""
+    """
+    Get a specific scene by stage name. Pass ?annotate=false for the bare scene,
+    which clients may cache for SCENE_CACHE_MAX_AGE; annotated scenes also depend
+    on the inventory and must be revalidated (cheaply, via their ETag).
+    ?include=next embeds the bare scenes one hop away under 'next_scenes'.
+    """
     try:
-        scene = Scene.query.filter_by(stage=stage).first()
+        graph = get_story_graph()
+        scene = graph.get(stage)
         if not scene:
             return jsonify({'error': f'Scene not found for stage: {stage}'}), 404
-        return jsonify(scene.to_dict()), 200
+        
+        extra, etag_suffix = None, ''
+        if include_next():
+            extra, next_hash = next_scenes_field(graph, scene.stage)
+            etag_suffix = f'.{next_hash}'
+        
+        character = current_player().character
+        if not character or request.args.get('annotate', 'true').lower() == 'false':
+            etag = scene.content_hash + etag_suffix
+            cache_control = f"private, max-age={current_app.config.get('SCENE_CACHE_MAX_AGE', 86400)}"
+            return not_modified(etag, cache_control, compressible=not extra) or with_etag(scene_json(scene, extra=extra), etag, cache_control)
+        
+        etag = f'{scene.content_hash}.{character.inventory_version}{etag_suffix}'
+        cache_control = 'private, no-cache'
+        response = not_modified(etag, cache_control, compressible=not extra)
+        if response:
+            return response
+        availability = option_availability(scene.options, character.id)
+        return with_etag(scene_json(scene, availability, extra=extra), etag, cache_control)
     except Exception as e:
         return jsonify({'error': 'Failed to get scene', 'details': str(e)}), 500
 
@@ -204,16 +332,19 @@ def use_item_for_story():
     if not data:
         return jsonify({'error': 'No JSON data provided'}), 400
     
-    current_stage = data.get('current')
     item_name = data.get('item_name')
     
     # print(f"DEBUG: Received item usage request - current_stage: {current_stage}, item_name: {item_name}")
 
-    if not current_stage:
-        return jsonify({'error': 'Missing current stage'}), 400
     if not item_name:
         return jsonify({'error': 'Missing item name'}), 400
-    current_node = Scene.query.filter_by(stage=current_stage).first()
+    game_state = current_player().game_state
+    try:
+        current_stage = locked_stage(game_state, data.get('current'))
+    except (NotFoundError, ConflictError) as e:
+        return jsonify({'error': e.message, 'details': e.details}), e.status_code
+    graph = get_story_graph()
+    current_node = graph.get(current_stage)
     if not current_node:
         return jsonify({'error': f'Invalid current node: {current_stage}'}), 400
 
@@ -223,26 +354,47 @@ def use_item_for_story():
         if trigger['item'] == item_name:
             # Trigger the next node.
             next_stage = trigger['next']
-            next_node = Scene.query.filter_by(stage=next_stage).first()
+            next_node = graph.get(next_stage)
             if next_node:
                 # Update the game state to reflect the new stage
-                user_id = get_jwt_identity()
-                character = Character.query.filter_by(user_id=user_id).first()
-                if character:
-                    game_state = GameState.query.filter_by(character_id=character.id).first()
-                    if game_state:
-                        game_state.scene_id = next_stage
-                        game_state.current_stage = next_stage
-                        db.session.commit()
+                if game_state:
+                    game_state.current_stage = next_stage
+                    game_state.append_event(current_stage, next_stage)
+                    db.session.commit()
+                    save_buffer.discard(game_state.character_id)
                 
-                return jsonify({
-                    'node': next_node.to_dict(),
-                    'message': f'Using {item_name} triggered story progression!'
-                })
+                return json_with_raw(
+                    {
+                        'message': f'Using {item_name} triggered story progression!',
+                        'game_ended': graph.is_ending(next_stage)
+                    },
+                    {'node': next_node.render()}
+                )
             else:
                 return jsonify({'error': f'Next node not found: {next_stage}'}), 404
 
-    return jsonify({
-        'message': f'{item_name} was used but no story progression was triggered',
-        'current_node': current_node.to_dict()
-    }), 200
\ No newline at end of file
+    return json_with_raw(
+        {'message': f'{item_name} was used but no story progression was triggered'},
+        {'current_node': current_node.render()}
+    )
+
+
+# Paginated choice history: the compacted snapshot, then the game_events log
+@game_bp.route('/history', methods=['GET'])
+@jwt_required()
+def get_history():
+    try:
+        game_state = current_player().game_state
+        if not game_state:
+            return jsonify({'error': 'Game state not found'}), 404
+
+        after = request.args.get('after', 0, type=int)
+        limit = max(1, min(request.args.get('limit', 50, type=int), 200))
+        events = game_state.history_page(after_seq=after, limit=limit)
+        return jsonify({
+            'events': events,
+            'last_event_seq': game_state.last_event_seq or 0,
+            'next_after': events[-1]['seq'] if len(events) == limit else None
+        }), 200
+    except Exception as e:
+        return jsonify({'error': 'Failed to get history', 'details': str(e)}), 500
\ No newline at end of file
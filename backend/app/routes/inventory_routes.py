@@ -1,6 +1,9 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from ..models import db, Inventory, Character, Users
+from flask_jwt_extended import jwt_required
+from ..models import db, Inventory, Item
+from ..utils.player import current_player
+from ..utils.error_handling import GameException, ValidationError, NotFoundError
+from ..utils.http_cache import not_modified, cached_json
 
 inventory_bp = Blueprint('inventory', __name__)
 
@@ -8,17 +11,22 @@ inventory_bp = Blueprint('inventory', __name__)
 @jwt_required()
 def get_inventory():
     try:
-        user_id = get_jwt_identity()
-        user = Users.query.filter_by(id=user_id).first()
+        user, character, _ = current_player()
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        character = Character.query.filter_by(user_id=user_id).first()
         if not character:
             return jsonify({'error': 'Character not found'}), 404
         
+        # The inventory version changes with every add/use/remove, so it is the ETag
+        etag = f'inventory-{character.id}-{character.inventory_version}'
+        cache_control = 'private, no-cache'
+        response = not_modified(etag, cache_control)
+        if response:
+            return response
+        
         inventory_items = Inventory.query.filter_by(character_id=character.id).all()
-        return jsonify({'inventory': [item.to_dict() for item in inventory_items]}), 200
+        return cached_json({'inventory': [item.to_dict() for item in inventory_items]}, etag, cache_control), 200
     except Exception as e:
         return jsonify({'error': 'Failed to get inventory', 'details': str(e)}), 500
 
@@ -26,12 +34,10 @@ def get_inventory():
 @jwt_required()
 def add_item():
     try:
-        user_id = get_jwt_identity()
-        user = Users.query.filter_by(id=user_id).first()
+        user, character, _ = current_player()
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        character = Character.query.filter_by(user_id=user_id).first()
         if not character:
             return jsonify({'error': 'Character not found'}), 404
         
@@ -39,14 +45,12 @@ def add_item():
         if not data or 'item_name' not in data:
             return jsonify({'error': 'Item name is required'}), 400
         
-        new_item = Inventory(
-            character_id=character.id,
-            item_name=data['item_name'],
-            description=data.get('description', ''),
-            used=False
-        )
+        quantity = data.get('quantity', 1)
+        if not isinstance(quantity, int) or quantity < 1:
+            return jsonify({'error': 'Quantity must be a positive integer'}), 400
         
-        db.session.add(new_item)
+        # Adds to the existing stack of this item, if any
+        new_item = Inventory.add_by_name(character.id, data['item_name'], data.get('description', ''), quantity)
         db.session.commit()
         
         return jsonify({'message': 'Item added successfully', 'item': new_item.to_dict()}), 201
@@ -58,12 +62,10 @@ def add_item():
 @jwt_required()
 def use_item(item_id):
     try:
-        user_id = get_jwt_identity()
-        user = Users.query.filter_by(id=user_id).first()
+        user, character, _ = current_player()
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        character = Character.query.filter_by(user_id=user_id).first()
         if not character:
             return jsonify({'error': 'Character not found'}), 404
         
@@ -74,10 +76,15 @@ def use_item(item_id):
         if item.used:
             return jsonify({'error': 'Item already used'}), 400
         
-        item.used = True
+        # Uses one item of the stack
+        used_item = item.consume()
         db.session.commit()
         
-        return jsonify({'message': 'Item used successfully', 'item': item.to_dict()}), 200
+        return jsonify({
+            'message': 'Item used successfully',
+            'item': used_item.to_dict(),
+            'remaining': item.quantity
+        }), 200
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Failed to use item', 'details': str(e)}), 500
@@ -86,17 +93,15 @@ def use_item(item_id):
 @jwt_required()
 def reset_inventory():
     try:
-        user_id = get_jwt_identity()
-        user = Users.query.filter_by(id=user_id).first()
+        user, character, _ = current_player()
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        character = Character.query.filter_by(user_id=user_id).first()
         if not character:
             return jsonify({'error': 'Character not found'}), 404
         
         # Delete all inventory items for this character
-        Inventory.query.filter_by(character_id=character.id).delete()
+        Inventory.clear(character.id)
         db.session.commit()
         
         return jsonify({'message': 'Inventory reset successfully'}), 200
@@ -104,3 +109,102 @@ def reset_inventory():
         db.session.rollback()
         return jsonify({'error': 'Failed to reset inventory', 'details': str(e)}), 500
 
+
+INVENTORY_OPERATIONS = ('add', 'use', 'remove', 'reset')
+
+def find_stack(stacks, operation):
+    """Unused stack named by an operation, either by stack 'id' or by 'item_name'"""
+    if 'id' in operation:
+        stack = stacks.get(operation['id'])
+        if stack is None or stack.used:
+            raise NotFoundError(f"Item not found: {operation['id']}")
+        return stack
+    if 'item_name' in operation:
+        for stack in stacks.values():
+            if not stack.used and stack.item_name == operation['item_name']:
+                return stack
+        raise NotFoundError(f"Item not found: {operation['item_name']}")
+    raise ValidationError("Operation needs an 'id' or an 'item_name'", {'operation': operation})
+
+def apply_inventory_operations(character_id, operations):
+    """
+    Apply add/use/remove/reset operations in order, without committing.
+    Returns the inventory delta: stacks that changed, ids of removed stacks and
+    whether the inventory was reset first.
+    """
+    stacks = {stack.id: stack for stack in Inventory.query.filter_by(character_id=character_id).all()}
+    touched = set()
+    was_reset = False
+    
+    # Resolve every added name to the catalog up front, in one statement
+    added_names = [op.get('item_name') for op in operations if op.get('op') == 'add']
+    item_ids = Item.ensure(added_names)
+    
+    for index, operation in enumerate(operations):
+        kind = operation.get('op')
+        if kind not in INVENTORY_OPERATIONS:
+            raise ValidationError(f'Unknown operation at index {index}: {kind}', {'allowed': list(INVENTORY_OPERATIONS)})
+        quantity = operation.get('quantity', 1)
+        if not isinstance(quantity, int) or quantity < 1:
+            raise ValidationError(f'Quantity must be a positive integer at index {index}')
+        
+        if kind == 'reset':
+            Inventory.clear(character_id)
+            stacks.clear()
+            touched.clear()
+            was_reset = True
+        elif kind == 'add':
+            if not operation.get('item_name'):
+                raise ValidationError(f'Item name is required at index {index}')
+            stack = Inventory.add(character_id, item_ids[operation['item_name']], quantity)
+            stacks[stack.id] = stack
+            touched.add(stack.id)
+        else:
+            stack = find_stack(stacks, operation)
+            if quantity > stack.quantity:
+                raise ValidationError(f'Not enough {stack.item_name} at index {index}')
+            touched.add(stack.id)
+            if kind == 'use':
+                used_stack = stack.consume(quantity)
+                stacks[used_stack.id] = used_stack
+                touched.add(used_stack.id)
+            else:
+                stack.remove(quantity)
+            if stack.quantity == 0:
+                del stacks[stack.id]
+    
+    db.session.flush()
+    return {
+        'updated': [stacks[stack_id].to_dict() for stack_id in sorted(touched) if stack_id in stacks],
+        'removed': sorted(stack_id for stack_id in touched if stack_id not in stacks),
+        'reset': was_reset
+    }
+
+# Applies a list of add/use/remove/reset operations in one transaction, e.g. several
+# rewards at once or restoring a save, and returns what changed
+@inventory_bp.route('/batch', methods=['POST'])
+@jwt_required()
+def batch_inventory():
+    try:
+        user, character, _ = current_player()
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        
+        if not character:
+            return jsonify({'error': 'Character not found'}), 404
+        
+        data = request.get_json()
+        operations = data.get('operations') if data else None
+        if not isinstance(operations, list) or not all(isinstance(op, dict) for op in operations):
+            return jsonify({'error': 'A list of operations is required'}), 400
+        
+        delta = apply_inventory_operations(character.id, operations)
+        db.session.commit()
+        
+        return jsonify({'message': 'Inventory updated successfully', 'inventory_delta': delta}), 200
+    except GameException:
+        db.session.rollback()
+        raise
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to update inventory', 'details': str(e)}), 500
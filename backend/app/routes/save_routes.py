@@ -0,0 +1,106 @@
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required
+from ..models import db, Character, SaveSlot
+from ..models.game_state import START_STAGE
+from ..utils.player import current_player
+from ..utils.story_graph import get_story_graph
+
+save_bp = Blueprint('saves', __name__)
+
+def validate_slot_name(name):
+    """Slot names are 1-64 characters after trimming"""
+    name = (name or '').strip()
+    if not name or len(name) > 64:
+        return None
+    return name
+
+# Metadata of every slot; the deferred snapshot columns are never read here
+@save_bp.route('/', methods=['GET'])
+@jwt_required()
+def list_slots():
+    try:
+        character = current_player().character
+        if not character:
+            return jsonify({'error': 'Character not found'}), 404
+
+        slots = SaveSlot.query.filter_by(character_id=character.id) \
+            .order_by(SaveSlot.updated_at.desc()) \
+            .all()
+        return jsonify({'slots': [slot.to_dict() for slot in slots]}), 200
+    except Exception as e:
+        return jsonify({'error': 'Failed to list save slots', 'details': str(e)}), 500
+
+@save_bp.route('/<name>', methods=['PUT'])
+@jwt_required()
+def save_slot(name):
+    try:
+        _, character, game_state = current_player()
+        if not character:
+            return jsonify({'error': 'Character not found'}), 404
+
+        name = validate_slot_name(name)
+        if not name:
+            return jsonify({'error': 'Slot name must be 1-64 characters long'}), 400
+
+        data = request.get_json() or {}
+        current_stage = data.get('current_stage')
+        if get_story_graph().is_ending(current_stage):
+            return jsonify({'error': 'Cannot save a finished game'}), 400
+        if current_stage and current_stage != START_STAGE and current_stage not in get_story_graph():
+            return jsonify({'error': f'Unknown stage: {current_stage}'}), 400
+
+        # Lock the character row so two saves to new slots can't both pass the limit check
+        db.session.query(Character.id).filter_by(id=character.id).with_for_update().one()
+        existing = SaveSlot.query.filter_by(character_id=character.id, name=name).first()
+        if not existing:
+            slot_count = SaveSlot.query.filter_by(character_id=character.id).count()
+            if slot_count >= current_app.config.get('SAVE_SLOT_LIMIT', 20):
+                return jsonify({'error': 'No free save slots'}), 400
+
+        SaveSlot.upsert(
+            character.id,
+            name,
+            current_stage,
+            data.get('current_stats'),
+            game_state.get_choice_history() if game_state else [],
+            data.get('inventory_snapshot')
+        )
+        db.session.commit()
+        return jsonify({'message': 'Game saved successfully.', 'slot': name}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Save failed', 'details': str(e)}), 500
+
+# Full snapshot of one slot, in the same shape as /api/auth/load
+@save_bp.route('/<name>', methods=['GET'])
+@jwt_required()
+def load_slot(name):
+    try:
+        character = current_player().character
+        if not character:
+            return jsonify({'error': 'Character not found'}), 404
+
+        slot = SaveSlot.query.filter_by(character_id=character.id, name=name).first()
+        if not slot:
+            return jsonify({'error': 'Save slot not found'}), 404
+
+        return jsonify(slot.to_dict(include_snapshot=True)), 200
+    except Exception as e:
+        return jsonify({'error': 'Load failed', 'details': str(e)}), 500
+
+@save_bp.route('/<name>', methods=['DELETE'])
+@jwt_required()
+def delete_slot(name):
+    try:
+        character = current_player().character
+        if not character:
+            return jsonify({'error': 'Character not found'}), 404
+
+        deleted = SaveSlot.query.filter_by(character_id=character.id, name=name).delete()
+        db.session.commit()
+        if not deleted:
+            return jsonify({'error': 'Save slot not found'}), 404
+        return jsonify({'message': 'Save slot deleted'}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to delete save slot', 'details': str(e)}), 500
@@ -0,0 +1,46 @@
+from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required
+from ..models import db, Inventory
+from ..utils.player import current_player
+from ..utils.story_graph import get_story_graph
+from ..utils.inventory_checks import annotated_scene_bytes
+from ..utils.http_cache import json_with_raw, splice_json
+from .game_routes import include_next, next_scenes_field
+
+session_bp = Blueprint('session', __name__)
+
+# Everything the game page needs on load, replacing the separate
+# /api/characters/get, /api/game/start and /api/inventory/ calls.
+@session_bp.route('/bootstrap', methods=['GET'])
+@jwt_required()
+def bootstrap_session():
+    try:
+        # User, character and latest game state, loaded once by the JWT user lookup
+        user, character, game_state = current_player()
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+
+        if not character:
+            return jsonify({'error': 'Character not found'}), 404
+
+        # If the game is still at "start", assign a random starting scene
+        if game_state and game_state.assign_start_scene():
+            db.session.commit()
+
+        inventory_items = Inventory.unused(character.id)
+        owned_items = {item.item_name for item in inventory_items}
+
+        current_scene = get_story_graph().get_by_id(game_state.scene_id) if game_state else None
+
+        current_scene_body = annotated_scene_bytes(current_scene, character.id, owned_items) if current_scene else None
+        if current_scene_body and include_next():
+            current_scene_body = splice_json(current_scene_body, next_scenes_field(get_story_graph(), current_scene.stage)[0])
+        return json_with_raw({
+            'user': user.to_dict(),
+            'character': character.to_dict(),
+            'game_state': game_state.to_dict(include_history=False) if game_state else None,
+            'inventory': [item.to_dict() for item in inventory_items]
+        }, {'current_scene': current_scene_body})
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to bootstrap session', 'details': str(e)}), 500
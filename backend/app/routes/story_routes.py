@@ -0,0 +1,99 @@
+import hmac
+from flask import Blueprint, jsonify, url_for, request, current_app
+from flask_jwt_extended import jwt_required
+from ..models import db
+from ..utils.story_graph import get_story_graph
+from ..utils.story_seed import reload_story, StoryValidationError
+from ..utils.player import current_player
+from ..utils.inventory_checks import load_owned_items
+from ..utils.http_cache import json_bytes, not_modified, with_etag
+
+story_bp = Blueprint('story', __name__)
+
+# A versioned bundle never changes, so it may be cached for a year
+BUNDLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Current bundle version and its URL. Always revalidated, it is the only
+# request a client makes to find out whether the story changed.
+@story_bp.route('/bundle', methods=['GET'])
+def get_bundle_manifest():
+    try:
+        bundle = get_story_graph().bundle()
+        response = jsonify({
+            'version': bundle.version,
+            'url': url_for('story.get_bundle', version=bundle.version)
+        })
+        response.headers['Cache-Control'] = 'no-cache'
+        return response, 200
+    except Exception as e:
+        return jsonify({'error': 'Failed to get story bundle', 'details': str(e)}), 500
+
+# Every scene and edge of one story version
+@story_bp.route('/bundle/<version>.json', methods=['GET'])
+def get_bundle(version):
+    try:
+        bundle = get_story_graph().bundle()
+        if version != bundle.version:
+            return jsonify({'error': f'Story bundle not found: {version}', 'current': bundle.version}), 404
+        
+        response = not_modified(bundle.version, BUNDLE_CACHE_CONTROL, compressible=True)
+        if response:
+            return response
+        return with_etag(json_bytes(bundle.body, compressed_body=bundle.compressed_body), bundle.version, BUNDLE_CACHE_CONTROL)
+    except Exception as e:
+        return jsonify({'error': 'Failed to get story bundle', 'details': str(e)}), 500
+
+
+def admin_token_valid():
+    """Admin calls carry STORY_ADMIN_TOKEN in X-Admin-Token; without a token configured they are disabled"""
+    expected = current_app.config.get('STORY_ADMIN_TOKEN')
+    given = request.headers.get('X-Admin-Token', '')
+    return bool(expected) and hmac.compare_digest(given.encode('utf-8'), expected.encode('utf-8'))
+
+# Validate and load a new story without a restart. The body may carry the story
+# as {"story": [...]}, which replaces the story file (and its compiled artifact);
+# otherwise the story file is re-read. Other workers pick the new version up
+# within STORY_GRAPH_CHECK_INTERVAL seconds.
+@story_bp.route('/reload', methods=['POST'])
+def trigger_reload():
+    if not admin_token_valid():
+        return jsonify({'error': 'Forbidden'}), 403
+    try:
+        data = request.get_json(silent=True) or {}
+        result = reload_story(data.get('story'), force=bool(data.get('force')))
+        return jsonify({
+            'message': 'Story unchanged' if result.skipped else 'Story reloaded',
+            'result': result._asdict(),
+            'bundle_version': get_story_graph().bundle().version
+        }), 200
+    except StoryValidationError:
+        raise
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to reload story', 'details': str(e)}), 500
+
+
+# Precomputed guidance for a stage: the option closest to an ending that the
+# player can take with their items, and what the stage itself takes to reach
+@story_bp.route('/hint/<stage>', methods=['GET'])
+@jwt_required()
+def get_hint(stage):
+    try:
+        graph = get_story_graph()
+        if stage not in graph:
+            return jsonify({'error': f'Scene not found for stage: {stage}'}), 404
+        analysis = graph.analysis()
+        character = current_player().character
+        owned_items = load_owned_items(character.id) if character else None
+        required_items = analysis.required_items(stage)
+        return jsonify({
+            'stage': stage,
+            'is_ending': analysis.is_ending(stage),
+            'option_index': analysis.hint(stage, owned_items),
+            'nearest_ending': analysis.nearest_ending(stage),
+            'distance_to_ending': analysis.distance_to_ending(stage),
+            'required_items': sorted(required_items) if required_items is not None else None,
+            'unlocking_items': analysis.unlocking_items(stage)
+        }), 200
+    except Exception as e:
+        return jsonify({'error': 'Failed to get hint', 'details': str(e)}), 500
@@ -29,6 +29,11 @@ class AuthenticationError(GameException):
     def __init__(self, message: str, details: Optional[Dict[str, Any]] = None):
         super().__init__(message, 401, details)
 
+class ConflictError(GameException):
+    """Exception for requests made against out-of-date state"""
+    def __init__(self, message: str, details: Optional[Dict[str, Any]] = None):
+        super().__init__(message, 409, details)
+
 class DatabaseError(GameException):
     """Exception for database errors"""
     def __init__(self, message: str, details: Optional[Dict[str, Any]] = None):
@@ -0,0 +1,93 @@
+"""
+Conditional GET and pre-serialized response helpers.
+
+Routes compute a strong ETag from data they already have (a scene's content
+hash, a character's inventory version) and call ``not_modified`` before doing
+any other work, so a matching ``If-None-Match`` costs no query and no JSON.
+Scenes are rendered to bytes once (``SceneNode.render``) and written as-is.
+A gzipped body is a different representation from the identity one, so it
+gets its own ETag (``-gz`` suffix) and both carry ``Vary: Accept-Encoding``.
+"""
+import json
+from typing import Any, Dict, Optional
+
+from flask import current_app, jsonify, request
+
+
+# Appended to the ETag of gzip-encoded responses
+GZIP_ETAG_SUFFIX = '-gz'
+
+
+def accepts_gzip() -> bool:
+    return 'gzip' in request.accept_encodings
+
+
+def not_modified(etag: str, cache_control: Optional[str] = None, compressible: bool = False):
+    """
+    A 304 response when the client already holds this ETag, else None. Pass
+    compressible when the full response would be gzipped for clients that accept it.
+    """
+    if compressible and accepts_gzip():
+        etag += GZIP_ETAG_SUFFIX
+    if not request.if_none_match.contains(etag):
+        return None
+    response = current_app.response_class(status=304)
+    if compressible:
+        response.vary.add('Accept-Encoding')
+    return with_etag(response, etag, cache_control)
+
+
+def with_etag(response, etag: str, cache_control: Optional[str] = None):
+    """Attach the ETag (with the gzip suffix for a gzipped body) and Cache-Control"""
+    if response.headers.get('Content-Encoding') == 'gzip' and not etag.endswith(GZIP_ETAG_SUFFIX):
+        etag += GZIP_ETAG_SUFFIX
+    response.set_etag(etag)
+    if cache_control:
+        response.headers['Cache-Control'] = cache_control
+    return response
+
+
+def cached_json(payload, etag: str, cache_control: Optional[str] = None):
+    """jsonify the payload and attach its ETag and Cache-Control"""
+    return with_etag(jsonify(payload), etag, cache_control)
+
+
+def json_bytes(body: bytes, status: int = 200, compressed_body: Optional[bytes] = None):
+    """Response for already serialized JSON, gzipped when the client accepts it"""
+    response = current_app.response_class(body, status=status, mimetype='application/json')
+    if compressed_body is not None:
+        response.vary.add('Accept-Encoding')
+        if accepts_gzip():
+            response.set_data(compressed_body)
+            response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+
+def splice_json(body: bytes, raw: Dict[str, Optional[bytes]]) -> bytes:
+    """
+    Add fields to a serialized JSON object. The values in raw are already
+    serialized JSON bytes (None becomes null) and are not re-encoded.
+    """
+    fields = b','.join(
+        json.dumps(key).encode('utf-8') + b':' + (value if value is not None else b'null')
+        for key, value in raw.items()
+    )
+    if not fields:
+        return body
+    body = body.rstrip()
+    return body[:-1] + (b',' if body != b'{}' else b'') + fields + b'}'
+
+
+def scene_json(node, availability=None, status: int = 200, extra: Optional[Dict[str, Optional[bytes]]] = None):
+    """
+    A scene's cached bytes, with the gzip variant for clients that accept it.
+    Fields in extra are spliced in, which skips the cached gzip variant.
+    """
+    if extra:
+        return json_bytes(splice_json(node.render(availability), extra), status)
+    return json_bytes(node.render(availability), status, node.render(availability, compressed=True))
+
+
+def json_with_raw(payload: Dict[str, Any], raw: Dict[str, Optional[bytes]], status: int = 200):
+    """jsonify-like response where the fields in raw are spliced in as serialized bytes"""
+    return json_bytes(splice_json(current_app.json.dumps(payload).encode('utf-8'), raw), status)
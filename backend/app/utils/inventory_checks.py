@@ -0,0 +1,82 @@
+"""
+Required-item checks for story options.
+
+All lookups go through a set of unused item names, loaded with a single
+``IN (...)`` query per scene instead of one query per required item. The query
+joins the item catalog and is served by the inventory's
+(character_id, used, item_id) index.
+"""
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from ..models import db, Inventory, Item
+
+
+def required_items_for(option: Optional[Mapping[str, Any]]) -> List[str]:
+    """All item names an option needs, from both required_item and required_items"""
+    if not option:
+        return []
+    required = []
+    if option.get('required_item'):
+        required.append(option['required_item'])
+    for item_name in option.get('required_items') or ():
+        if item_name not in required:
+            required.append(item_name)
+    return required
+
+
+def load_owned_items(character_id: int, item_names: Optional[Iterable[str]] = None) -> Set[str]:
+    """
+    Names of the character's unused items. When item_names is given only those
+    names are looked up, and an empty list skips the query entirely.
+    """
+    query = db.session.query(Item.name).join(Inventory, Inventory.item_id == Item.id).filter(
+        Inventory.character_id == character_id,
+        Inventory.used.is_(False)
+    )
+    if item_names is not None:
+        item_names = set(item_names)
+        if not item_names:
+            return set()
+        query = query.filter(Item.name.in_(item_names))
+    return {item_name for (item_name,) in query.distinct()}
+
+
+def validate_required_items(option, character_id, owned_items: Optional[Set[str]] = None) -> Tuple[bool, List[str]]:
+    """
+    Validate if the player has the required items for a choice.
+    Returns (is_valid, missing_items) tuple.
+    """
+    required = required_items_for(option)
+    if not required:
+        return True, []
+    if owned_items is None:
+        owned_items = load_owned_items(character_id, required)
+    missing_items = [item_name for item_name in required if item_name not in owned_items]
+    return len(missing_items) == 0, missing_items
+
+
+def option_availability(options, character_id, owned_items: Optional[Set[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Availability of every option of a scene, computed with at most one query.
+    Returns a list of {'available': bool, 'missing_items': [...]} in option order.
+    """
+    options = options or ()
+    if owned_items is None:
+        needed = {item_name for option in options for item_name in required_items_for(option)}
+        owned_items = load_owned_items(character_id, needed)
+
+    availability = []
+    for option in options:
+        is_valid, missing_items = validate_required_items(option, character_id, owned_items)
+        availability.append({'available': is_valid, 'missing_items': missing_items})
+    return availability
+
+
+def annotated_scene(node, character_id, owned_items: Optional[Set[str]] = None) -> Dict[str, Any]:
+    """Scene dict whose options carry 'available' and 'missing_items' for this character"""
+    return node.to_dict(option_availability(node.options, character_id, owned_items))
+
+
+def annotated_scene_bytes(node, character_id, owned_items: Optional[Set[str]] = None, compressed: bool = False) -> bytes:
+    """``annotated_scene`` as cached JSON bytes (see ``SceneNode.render``)"""
+    return node.render(option_availability(node.options, character_id, owned_items), compressed)
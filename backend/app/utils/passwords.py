@@ -0,0 +1,71 @@
+"""
+Password hashing off the request thread.
+
+bcrypt is deliberately slow, so hashes are computed on a small, bounded thread
+pool. When the pool and its queue are full, callers get ``PasswordHasherBusy``
+straight away instead of piling up behind a login storm; this needs a threaded
+gunicorn worker (see gunicorn.conf.py), since a sync worker only ever has one
+caller. The work factor comes from
+``BCRYPT_LOG_ROUNDS``; ``PASSWORD_HASH_CHEAP_MODE`` drops it to the bcrypt
+minimum for load tests. Hashes below the configured cost are rehashed on login,
+except in cheap mode, which must never downgrade stored hashes.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from .error_handling import GameException
+
+# Lowest cost bcrypt accepts, used by the cheap mode
+MIN_LOG_ROUNDS = 4
+
+
+class PasswordHasherBusy(GameException):
+    """All hashing slots are taken"""
+    def __init__(self):
+        super().__init__('Server is busy, please try again', 503)
+
+
+class PasswordHasher:
+    def __init__(self, app=None, bcrypt=None):
+        self._bcrypt = bcrypt
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots: Optional[threading.BoundedSemaphore] = None
+        self.log_rounds = 12
+        self.target_rounds = 12
+        self.cheap_mode = False
+        if app is not None:
+            self.init_app(app, bcrypt)
+
+    def init_app(self, app, bcrypt):
+        self._bcrypt = bcrypt
+        workers = app.config.get('PASSWORD_HASH_WORKERS', 2)
+        queue_size = app.config.get('PASSWORD_HASH_QUEUE_SIZE', 2)
+        self.target_rounds = app.config.get('BCRYPT_LOG_ROUNDS', 12)
+        self.cheap_mode = bool(app.config.get('PASSWORD_HASH_CHEAP_MODE'))
+        self.log_rounds = MIN_LOG_ROUNDS if self.cheap_mode else self.target_rounds
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+
+    def _run(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy()
+        try:
+            return self._executor.submit(func, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password: str) -> str:
+        return self._run(self._bcrypt.generate_password_hash, password, self.log_rounds).decode('utf-8')
+
+    def verify(self, password_hash: str, password: str) -> bool:
+        return self._run(self._bcrypt.check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        """True when the stored hash ($2b$<cost>$...) is cheaper than BCRYPT_LOG_ROUNDS"""
+        if self.cheap_mode:
+            return False
+        try:
+            return int(password_hash.split('$')[2]) < self.target_rounds
+        except (IndexError, ValueError):
+            return True
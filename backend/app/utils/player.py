@@ -0,0 +1,52 @@
+"""
+Request-scoped identity loading.
+
+The JWT user lookup and every route need the same user, character and game
+state rows. ``current_player()`` loads them once per request with a single
+joined query and keeps the result on ``flask.g``.
+"""
+from typing import NamedTuple, Optional
+
+from flask import g
+from flask_jwt_extended import get_jwt_identity
+
+from ..models import db, Users, Character, GameState
+
+
+class Player(NamedTuple):
+    user: Optional[Users]
+    character: Optional[Character]
+    game_state: Optional[GameState]
+
+
+def load_player(user_id) -> Player:
+    """User, character and game state for a user id in one joined query"""
+    row = db.session.query(Users, Character, GameState) \
+        .outerjoin(Character, Character.user_id == Users.id) \
+        .outerjoin(GameState, GameState.character_id == Character.id) \
+        .filter(Users.id == int(user_id)) \
+        .first()
+    if not row:
+        return Player(None, None, None)
+    return Player(*row)
+
+
+def load_current_player(user_id) -> Player:
+    """Load the player for this request once and cache it on flask.g"""
+    player = g.get('player')
+    if player is None or g.get('player_id') != str(user_id):
+        player = load_player(user_id)
+        g.player = player
+        g.player_id = str(user_id)
+    return player
+
+
+def current_player() -> Player:
+    """Player for the JWT identity of the current request"""
+    return load_current_player(get_jwt_identity())
+
+
+def forget_current_player():
+    """Drop the cached player, e.g. after creating the character mid-request"""
+    g.pop('player', None)
+    g.pop('player_id', None)
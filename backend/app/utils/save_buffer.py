@@ -0,0 +1,87 @@
+"""
+Optional write-behind buffer for autosaves.
+
+With ``SAVE_BUFFER_ENABLED`` set, soft saves only replace the character's slot
+in an in-memory dict. A background thread writes all pending slots with one
+multi-row upsert every ``SAVE_BUFFER_FLUSH_INTERVAL`` seconds, when
+``SAVE_BUFFER_MAX_PENDING`` slots are waiting, and at shutdown, so several
+saves inside one window cost a single write. Hard saves and endings
+go straight to the database and drop any pending slot.
+
+Slots are per worker: a load only sees a pending save made through the
+same worker.
+"""
+import atexit
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SaveBuffer:
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = False
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('SAVE_BUFFER_ENABLED', False)
+        self.interval = app.config.get('SAVE_BUFFER_FLUSH_INTERVAL', 10)
+        self.max_pending = app.config.get('SAVE_BUFFER_MAX_PENDING', 500)
+        if self.enabled and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='save-buffer', daemon=True)
+            self._thread.start()
+            atexit.register(self.flush)
+
+    def put(self, row: Dict[str, Any]):
+        """Store a save row (see GameState.save_row), replacing any pending one for the character"""
+        with self._lock:
+            self._pending[row['character_id']] = row
+            full = len(self._pending) >= self.max_pending
+        if full:
+            self._wake.set()
+
+    def get(self, character_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._pending.get(character_id)
+
+    def discard(self, character_id: int):
+        with self._lock:
+            self._pending.pop(character_id, None)
+
+    def flush(self) -> int:
+        """Write every pending slot with one upsert; returns how many were written"""
+        with self._lock:
+            rows = list(self._pending.values())
+            self._pending.clear()
+        if not rows:
+            return 0
+
+        from ..models import db, GameState
+        with self.app.app_context():
+            try:
+                GameState.upsert_many(rows)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f'Failed to flush {len(rows)} buffered saves: {e}')
+                # Put the rows back unless a newer save for the character arrived meanwhile
+                with self._lock:
+                    for row in rows:
+                        self._pending.setdefault(row['character_id'], row)
+                return 0
+        logger.info('Flushed %d buffered saves', len(rows))
+        return len(rows)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
@@ -0,0 +1,55 @@
+"""
+Compact storage for save snapshots.
+
+``current_stats``, ``inventory_snapshot`` and ``choice_history`` are stored as
+a version byte followed by zlib-compressed compact JSON. Version 1 primes zlib
+with a preset dictionary of the keys every snapshot repeats, so they cost a
+back-reference instead of their full text even in small blobs.
+"""
+import json
+import zlib
+from typing import Any, Optional
+
+from sqlalchemy.types import LargeBinary, TypeDecorator
+
+FORMAT_V1 = 1
+
+# Never change this for an existing version; add a new version instead
+_V1_DICTIONARY = json.dumps([
+    'item_name', 'description', 'used', 'created_at', 'character_id', 'id',
+    'seq', 'stage', 'choice_index', 'next', 'stat_changes', 'reward',
+    'fear', 'sanity', 'Reward from story choice', 'ending_', 'start_',
+    True, False, None
+], separators=(',', ':')).encode('utf-8')
+
+
+def encode_snapshot(value: Any) -> Optional[bytes]:
+    if value is None:
+        return None
+    raw = json.dumps(value, separators=(',', ':')).encode('utf-8')
+    compressor = zlib.compressobj(level=9, zdict=_V1_DICTIONARY)
+    return bytes([FORMAT_V1]) + compressor.compress(raw) + compressor.flush()
+
+
+def decode_snapshot(blob: Optional[bytes]) -> Any:
+    if blob is None:
+        return None
+    blob = bytes(blob)
+    version = blob[0]
+    if version != FORMAT_V1:
+        raise ValueError(f'Unknown snapshot format version: {version}')
+    decompressor = zlib.decompressobj(zdict=_V1_DICTIONARY)
+    raw = decompressor.decompress(blob[1:]) + decompressor.flush()
+    return json.loads(raw)
+
+
+class SnapshotJSON(TypeDecorator):
+    """JSON-compatible column stored with the compact snapshot codec"""
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return encode_snapshot(value)
+
+    def process_result_value(self, value, dialect):
+        return decode_snapshot(value)
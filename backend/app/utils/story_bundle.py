@@ -0,0 +1,34 @@
+"""
+Whole-story bundle for clients that navigate locally.
+
+The bundle holds every scene (text, options and item triggers, i.e. all edges)
+and the ending stages as one JSON document, pre-compressed. Its version is a
+hash of the scenes' content hashes, so any story change yields a new version
+and a new URL, and a versioned bundle can be cached forever.
+"""
+import gzip
+import hashlib
+import json
+from typing import NamedTuple
+
+
+class StoryBundle(NamedTuple):
+    version: str
+    body: bytes
+    compressed_body: bytes
+
+
+def build_story_bundle(graph) -> StoryBundle:
+    nodes = sorted(graph, key=lambda node: node.stage)
+    digest = hashlib.sha256()
+    for node in nodes:
+        digest.update(node.stage.encode('utf-8'))
+        digest.update(node.content_hash.encode('ascii'))
+    version = digest.hexdigest()[:20]
+
+    body = json.dumps({
+        'version': version,
+        'endings': sorted(graph.endings),
+        'scenes': {node.stage: node.to_dict() for node in nodes}
+    }, separators=(',', ':')).encode('utf-8')
+    return StoryBundle(version, body, gzip.compress(body, mtime=0))
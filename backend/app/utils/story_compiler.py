@@ -0,0 +1,364 @@
+"""
+Story graph compiler.
+
+Validates a story (every ``next`` of an option or item trigger must name a real
+stage) and precomputes what the runtime would otherwise work out by walking
+the graph: integer node ids, the ending and terminal sets, reachability, the
+shortest distance from every node to every ending, a hint per node and the
+items needed on every path to a node. The result is a compact JSON artifact;
+``CompiledStory`` loads it and answers each question with a lookup.
+
+Run ``python compile_story.py`` from the backend directory to check the story
+and write the artifact. This module only uses the standard library.
+"""
+import hashlib
+import json
+import os
+from collections import deque
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+ARTIFACT_FORMAT = 1
+COMPILED_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'story.compiled.json')
+
+# Distance reported for an ending that cannot be reached
+UNREACHABLE = -1
+
+
+def is_ending_stage(stage: Optional[str]) -> bool:
+    """Endings are the stages whose name starts with 'ending'"""
+    return bool(stage) and str(stage).startswith('ending')
+
+
+def is_start_stage(stage: Optional[str]) -> bool:
+    """New games begin at the stages whose name starts with 'start_'"""
+    return bool(stage) and str(stage).startswith('start_')
+
+
+def scene_content_hash(scene_data: Dict[str, Any]) -> str:
+    """sha256 of the parts of a scene the story defines"""
+    content = {
+        'description': scene_data.get('description'),
+        'options': scene_data.get('options'),
+        'item_triggers': scene_data.get('item_triggers')
+    }
+    return hashlib.sha256(json.dumps(content, sort_keys=True, separators=(',', ':')).encode('utf-8')).hexdigest()
+
+
+def story_fingerprint(story_data: Iterable[Dict[str, Any]]) -> str:
+    """Hash of every scene's content, independent of scene order and database ids"""
+    digest = hashlib.sha256()
+    for stage, content_hash in sorted((scene['stage'], scene_content_hash(scene)) for scene in story_data):
+        digest.update(f'{stage}:{content_hash}\n'.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def required_items_for(option: Dict[str, Any]) -> List[str]:
+    """All item names an option needs, from both required_item and required_items"""
+    required = []
+    if option.get('required_item'):
+        required.append(option['required_item'])
+    for item_name in option.get('required_items') or ():
+        if item_name not in required:
+            required.append(item_name)
+    return required
+
+
+def validate_story(story_data: Any) -> List[str]:
+    """Structural problems of a story: missing fields, duplicate stages, dangling next"""
+    if not isinstance(story_data, list) or not story_data:
+        return ['Story must be a non-empty list of scenes']
+    errors = []
+    stages = set()
+    for index, scene in enumerate(story_data):
+        if not isinstance(scene, dict) or not isinstance(scene.get('stage'), str):
+            errors.append(f'Scene {index} has no stage')
+            continue
+        if scene['stage'] in stages:
+            errors.append(f"Duplicate stage: {scene['stage']}")
+        stages.add(scene['stage'])
+        if not isinstance(scene.get('options') or [], list) or not isinstance(scene.get('item_triggers') or [], list):
+            errors.append(f"Scene {scene['stage']}: options and item_triggers must be lists")
+    if errors:
+        return errors
+    for scene in story_data:
+        for edge in (scene.get('options') or []) + (scene.get('item_triggers') or []):
+            if not isinstance(edge, dict):
+                errors.append(f"Scene {scene['stage']}: options and item triggers must be objects")
+                continue
+            next_stage = edge.get('next')
+            if next_stage and next_stage not in stages:
+                errors.append(f"Scene {scene['stage']} points to unknown stage: {next_stage}")
+    return errors
+
+
+class StoryCompileError(ValueError):
+    def __init__(self, errors: List[str]):
+        super().__init__('; '.join(errors))
+        self.errors = errors
+
+
+def _bfs(adjacency: List[List[int]], source: int) -> List[int]:
+    """Unweighted shortest distances from source"""
+    distance = [UNREACHABLE] * len(adjacency)
+    distance[source] = 0
+    queue = deque([source])
+    while queue:
+        node = queue.popleft()
+        for neighbor in adjacency[node]:
+            if distance[neighbor] == UNREACHABLE:
+                distance[neighbor] = distance[node] + 1
+                queue.append(neighbor)
+    return distance
+
+
+def compile_story(story_data: List[Dict[str, Any]], starts: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """
+    Validate a story and build its artifact. Raises StoryCompileError listing every
+    structural problem. starts defaults to the 'start_' stages.
+    """
+    errors = validate_story(story_data)
+    if errors:
+        raise StoryCompileError(errors)
+
+    stages = [scene['stage'] for scene in story_data]
+    index = {stage: node_id for node_id, stage in enumerate(stages)}
+    starts = [stage for stage in stages if is_start_stage(stage)] if starts is None else list(starts)
+    unknown_starts = [stage for stage in starts if stage not in index]
+    if unknown_starts or not starts:
+        raise StoryCompileError([f'Unknown start stage: {stage}' for stage in unknown_starts] or ['Story has no start stage'])
+
+    items: List[str] = []
+    item_ids: Dict[str, int] = {}
+
+    def item_id(name: str) -> int:
+        if name not in item_ids:
+            item_ids[name] = len(items)
+            items.append(name)
+        return item_ids[name]
+
+    # Per node, every option as [next_id, [required item ids]] (next_id -1 when the
+    # option leads nowhere) and every item trigger as [next_id, item_id]
+    options: List[List[List[Any]]] = []
+    triggers: List[List[List[int]]] = []
+    rewarded: Set[str] = set()
+    for scene in story_data:
+        node_options = []
+        for option in scene.get('options') or []:
+            next_stage = option.get('next')
+            if option.get('reward'):
+                rewarded.add(option['reward'])
+            node_options.append([
+                index[next_stage] if next_stage else UNREACHABLE,
+                [item_id(name) for name in required_items_for(option)]
+            ])
+        options.append(node_options)
+        triggers.append([
+            [index[trigger['next']], item_id(trigger['item'])]
+            for trigger in scene.get('item_triggers') or [] if trigger.get('next') and trigger.get('item')
+        ])
+
+    # Every edge as (next_id, required item ids)
+    edges = [
+        [(next_id, required) for next_id, required in options[node_id] if next_id != UNREACHABLE]
+        + [(next_id, [item]) for next_id, item in triggers[node_id]]
+        for node_id in range(len(stages))
+    ]
+
+    size = len(stages)
+    adjacency = [sorted({next_id for next_id, _ in node_edges}) for node_edges in edges]
+    reverse: List[List[int]] = [[] for _ in range(size)]
+    for node_id, neighbors in enumerate(adjacency):
+        for neighbor in neighbors:
+            reverse[neighbor].append(node_id)
+
+    endings = [node_id for node_id, stage in enumerate(stages) if is_ending_stage(stage)]
+    terminals = [node_id for node_id in range(size) if not adjacency[node_id]]
+    start_ids = [index[stage] for stage in starts]
+
+    # Reachability as one bitmask per node (bit j set: node j reachable, the node itself included)
+    reachable = []
+    for node_id in range(size):
+        mask = 0
+        for other, distance in enumerate(_bfs(adjacency, node_id)):
+            if distance != UNREACHABLE:
+                mask |= 1 << other
+        reachable.append(mask)
+    from_start = 0
+    for start_id in start_ids:
+        from_start |= reachable[start_id]
+
+    # distance[node][k]: fewest moves from node to the k-th ending
+    to_ending = [_bfs(reverse, ending_id) for ending_id in endings]
+    distance = [[to_ending[k][node_id] for k in range(len(endings))] for node_id in range(size)]
+
+    def nearest(node_id: int) -> int:
+        reachable_distances = [d for d in distance[node_id] if d != UNREACHABLE]
+        return min(reachable_distances) if reachable_distances else UNREACHABLE
+
+    # Hint: the option leading closest to an ending
+    hint = []
+    for node_id in range(size):
+        best, best_distance = UNREACHABLE, None
+        if node_id not in endings:
+            for option_index, (target, _) in enumerate(options[node_id]):
+                target_distance = nearest(target) if target != UNREACHABLE else UNREACHABLE
+                if target_distance != UNREACHABLE and (best_distance is None or target_distance < best_distance):
+                    best, best_distance = option_index, target_distance
+        hint.append(best)
+
+    # Items needed on every path from a start to each node: the intersection over
+    # incoming edges of (items needed at the source | items the edge requires)
+    needed: List[Optional[FrozenSet[int]]] = [None] * size
+    queue = deque(start_ids)
+    for start_id in start_ids:
+        needed[start_id] = frozenset()
+    while queue:
+        node_id = queue.popleft()
+        for next_id, required in edges[node_id]:
+            candidate = needed[node_id] | frozenset(required)
+            current = needed[next_id]
+            updated = candidate if current is None else current & candidate
+            if updated != current:
+                needed[next_id] = updated
+                queue.append(next_id)
+
+    warnings = []
+    for node_id, stage in enumerate(stages):
+        if not from_start >> node_id & 1:
+            warnings.append(f'Unreachable from any start: {stage}')
+        elif node_id not in endings and nearest(node_id) == UNREACHABLE:
+            warnings.append(f'No ending reachable from: {stage}')
+        if node_id in terminals and node_id not in endings:
+            warnings.append(f'Dead end that is not an ending: {stage}')
+    for name in items:
+        if name not in rewarded:
+            warnings.append(f'Required item is never rewarded: {name}')
+
+    return {
+        'format': ARTIFACT_FORMAT,
+        'fingerprint': story_fingerprint(story_data),
+        'stages': stages,
+        'items': items,
+        'starts': start_ids,
+        'endings': endings,
+        'terminals': terminals,
+        'options': options,
+        'triggers': triggers,
+        'reachable': [format(mask, 'x') for mask in reachable],
+        'reachable_from_start': format(from_start, 'x'),
+        'distance': distance,
+        'hint': hint,
+        'required_items': [sorted(items_needed) if items_needed is not None else None for items_needed in needed],
+        'warnings': warnings
+    }
+
+
+class CompiledStory:
+    """Constant-time queries over a compiled story artifact"""
+
+    def __init__(self, artifact: Dict[str, Any]):
+        if artifact.get('format') != ARTIFACT_FORMAT:
+            raise ValueError(f"Unknown compiled story format: {artifact.get('format')}")
+        self.fingerprint = artifact['fingerprint']
+        self.stages: Tuple[str, ...] = tuple(artifact['stages'])
+        self.items: Tuple[str, ...] = tuple(artifact['items'])
+        self._index = {stage: node_id for node_id, stage in enumerate(self.stages)}
+        self._endings = tuple(artifact['endings'])
+        self.endings = frozenset(self.stages[node_id] for node_id in self._endings)
+        self.terminals = frozenset(self.stages[node_id] for node_id in artifact['terminals'])
+        self.starts = tuple(self.stages[node_id] for node_id in artifact['starts'])
+        self._options = artifact['options']
+        self._triggers = artifact['triggers']
+        self._reachable = [int(mask, 16) for mask in artifact['reachable']]
+        self._from_start = int(artifact['reachable_from_start'], 16)
+        self._distance = artifact['distance']
+        self._hint = artifact['hint']
+        self._required = [
+            frozenset(self.items[item] for item in required) if required is not None else None
+            for required in artifact['required_items']
+        ]
+        self.warnings = tuple(artifact.get('warnings', ()))
+
+    @classmethod
+    def load(cls, path: str = COMPILED_FILE) -> 'CompiledStory':
+        with open(path, 'r') as file:
+            return cls(json.load(file))
+
+    @classmethod
+    def from_story(cls, story_data: List[Dict[str, Any]]) -> 'CompiledStory':
+        return cls(compile_story(story_data))
+
+    def id_of(self, stage: Optional[str]) -> Optional[int]:
+        return self._index.get(stage)
+
+    def is_ending(self, stage: Optional[str]) -> bool:
+        # Stages outside the story (e.g. stale saves) fall back to the naming rule
+        if stage not in self._index:
+            return is_ending_stage(stage)
+        return stage in self.endings
+
+    def is_reachable(self, stage: str) -> bool:
+        """Whether a new game can ever get to stage"""
+        node_id = self._index.get(stage)
+        return node_id is not None and bool(self._from_start >> node_id & 1)
+
+    def can_reach(self, from_stage: str, to_stage: str) -> bool:
+        from_id, to_id = self._index.get(from_stage), self._index.get(to_stage)
+        if from_id is None or to_id is None:
+            return False
+        return bool(self._reachable[from_id] >> to_id & 1)
+
+    def distance_to_ending(self, stage: str, ending: Optional[str] = None) -> Optional[int]:
+        """Fewest moves from stage to the given ending (any ending by default); None if unreachable"""
+        node_id = self._index.get(stage)
+        if node_id is None:
+            return None
+        if ending is not None:
+            if ending not in self.endings:
+                return None
+            distances = [self._distance[node_id][self._endings.index(self._index[ending])]]
+        else:
+            distances = self._distance[node_id]
+        reachable_distances = [d for d in distances if d != UNREACHABLE]
+        return min(reachable_distances) if reachable_distances else None
+
+    def nearest_ending(self, stage: str) -> Optional[str]:
+        node_id = self._index.get(stage)
+        if node_id is None:
+            return None
+        best = None
+        for k, d in enumerate(self._distance[node_id]):
+            if d != UNREACHABLE and (best is None or d < self._distance[node_id][best]):
+                best = k
+        return self.stages[self._endings[best]] if best is not None else None
+
+    def required_items(self, stage: str) -> Optional[FrozenSet[str]]:
+        """Items needed on every path from a start to stage; None if it cannot be reached"""
+        node_id = self._index.get(stage)
+        return self._required[node_id] if node_id is not None else None
+
+    def hint(self, stage: str, owned_items: Optional[Set[str]] = None) -> Optional[int]:
+        """
+        Index of the option leading closest to an ending. With owned_items, only
+        options the player can take are considered. Endings have no hint.
+        """
+        node_id = self._index.get(stage)
+        if node_id is None or stage in self.endings:
+            return None
+        if owned_items is None:
+            return self._hint[node_id] if self._hint[node_id] != UNREACHABLE else None
+        best, best_distance = None, None
+        for option_index, (next_id, required) in enumerate(self._options[node_id]):
+            if next_id == UNREACHABLE or not all(self.items[item] in owned_items for item in required):
+                continue
+            target_distance = self.distance_to_ending(self.stages[next_id])
+            if target_distance is not None and (best_distance is None or target_distance < best_distance):
+                best, best_distance = option_index, target_distance
+        return best
+
+    def unlocking_items(self, stage: str) -> Dict[str, str]:
+        """Items whose trigger in stage leads somewhere, mapped to the stage they lead to"""
+        node_id = self._index.get(stage)
+        if node_id is None:
+            return {}
+        return {self.items[item]: self.stages[next_id] for next_id, item in self._triggers[node_id]}
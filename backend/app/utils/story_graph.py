@@ -0,0 +1,330 @@
+"""
+In-process, read-only copy of the story.
+
+Scenes only change when the story is reseeded, so every worker loads the
+``scenes`` table once into a stage-keyed ``StoryGraph`` and serves all scene
+lookups from memory. A cheap version stamp (the ``story_version`` row, bumped
+by every seed or reload) is re-checked at most every
+``STORY_GRAPH_CHECK_INTERVAL`` seconds so a reseed in any worker invalidates
+the cache. A new graph replaces the old one in a single reference swap, and
+each request keeps the graph it saw first, so it never mixes two versions.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from flask import current_app, g
+from sqlalchemy import func
+
+from .story_compiler import COMPILED_FILE, CompiledStory, StoryCompileError, is_ending_stage, story_fingerprint
+
+logger = logging.getLogger(__name__)
+
+STORY_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'cityStory.json')
+
+
+def _freeze(value: Any) -> Any:
+    """Recursively turn dicts and lists into read-only equivalents"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    """Turn a frozen structure back into plain dicts and lists for JSON output"""
+    if isinstance(value, Mapping):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+
+class SceneNode:
+    """Immutable view of a single scene"""
+
+    __slots__ = ('id', 'stage', 'description', 'options', 'item_triggers',
+                 'created_at', 'neighbors', 'is_ending', 'content_hash', '_rendered')
+
+    def __init__(self, id, stage, description, options, item_triggers, created_at=None):
+        object.__setattr__(self, 'id', id)
+        object.__setattr__(self, 'stage', stage)
+        object.__setattr__(self, 'description', description)
+        object.__setattr__(self, 'options', _freeze(options or []))
+        object.__setattr__(self, 'item_triggers', _freeze(item_triggers) if item_triggers is not None else None)
+        object.__setattr__(self, 'created_at', created_at)
+
+        neighbors = []
+        for edge in tuple(self.options) + tuple(self.item_triggers or ()):
+            next_stage = edge.get('next')
+            if next_stage and next_stage not in neighbors:
+                neighbors.append(next_stage)
+        object.__setattr__(self, 'neighbors', tuple(neighbors))
+        object.__setattr__(self, 'is_ending', is_ending_stage(stage))
+        # Serialized payloads by availability, see render()
+        object.__setattr__(self, '_rendered', {})
+        # Hash of the serialized scene, used as its ETag
+        object.__setattr__(self, 'content_hash', hashlib.sha256(self.render()).hexdigest()[:32])
+
+    def __setattr__(self, name, value):
+        raise AttributeError('SceneNode is immutable')
+
+    def __repr__(self):
+        return f'<SceneNode {self.stage}>'
+
+    def option(self, index: int) -> Optional[Mapping[str, Any]]:
+        if 0 <= index < len(self.options):
+            return self.options[index]
+        return None
+
+    def trigger_for(self, item_name: str) -> Optional[Mapping[str, Any]]:
+        for trigger in self.item_triggers or ():
+            if trigger.get('item') == item_name:
+                return trigger
+        return None
+
+    def to_dict(self, availability: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """
+        Same shape as ``Scene.to_dict()`` plus ``is_ending``, so clients never guess
+        endings from stage names. When availability is given (one entry per
+        option, see ``option_availability``) it is merged into each option.
+        """
+        options = _thaw(self.options)
+        if availability is not None:
+            for option, status in zip(options, availability):
+                option.update(status)
+        return {
+            'id': self.id,
+            'stage': self.stage,
+            'description': self.description,
+            'options': options,
+            'item_triggers': _thaw(self.item_triggers),
+            'is_ending': self.is_ending,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+    def render(self, availability: Optional[List[Dict[str, Any]]] = None, compressed: bool = False) -> bytes:
+        """
+        ``to_dict(availability)`` as JSON bytes, optionally gzipped. Each variant is
+        built once per node; a node belongs to one graph version, so the cache is
+        effectively keyed by scene id, story version and option availability.
+        """
+        key = None
+        if availability is not None:
+            key = tuple((status['available'], tuple(status['missing_items'])) for status in availability)
+        body = self._rendered.get((key, compressed))
+        if body is None:
+            if compressed:
+                body = gzip.compress(self.render(availability), mtime=0)
+            else:
+                body = json.dumps(self.to_dict(availability), separators=(',', ':')).encode('utf-8')
+            self._rendered[(key, compressed)] = body
+        return body
+
+
+class StoryGraph:
+    """Stage-keyed, read-only collection of scenes"""
+
+    def __init__(self, nodes: Iterable[SceneNode], version: Any = None):
+        self._nodes = MappingProxyType({node.stage: node for node in nodes})
+        self._by_id = MappingProxyType({node.id: node for node in self._nodes.values() if node.id is not None})
+        self.version = version
+        self.endings = frozenset(stage for stage, node in self._nodes.items() if node.is_ending)
+        self._next_rendered: Dict[str, Tuple[bytes, str]] = {}
+        self._bundle = None
+        self._analysis: Optional[CompiledStory] = None
+
+    def __contains__(self, stage):
+        return stage in self._nodes
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def __iter__(self):
+        return iter(self._nodes.values())
+
+    @property
+    def stages(self) -> Tuple[str, ...]:
+        return tuple(self._nodes)
+
+    def get(self, stage: Optional[str]) -> Optional[SceneNode]:
+        if stage is None:
+            return None
+        return self._nodes.get(stage)
+
+    def get_by_id(self, scene_id: Optional[int]) -> Optional[SceneNode]:
+        if scene_id is None:
+            return None
+        return self._by_id.get(scene_id)
+
+    def neighbors(self, stage: str) -> Tuple[str, ...]:
+        node = self._nodes.get(stage)
+        return node.neighbors if node else ()
+
+    def item_names(self) -> frozenset:
+        """Every item the story rewards, requires or reacts to"""
+        names = set()
+        for node in self._nodes.values():
+            for option in node.options:
+                names.add(option.get('reward'))
+                names.add(option.get('required_item'))
+                names.update(option.get('required_items') or ())
+            names.update(trigger.get('item') for trigger in node.item_triggers or ())
+        names.discard(None)
+        return frozenset(names)
+
+    def next_scenes(self, stage: str) -> Tuple[bytes, str]:
+        """
+        JSON object of every scene one hop from stage (options and item triggers),
+        keyed by stage, plus a hash of it. Built once per stage and graph version.
+        """
+        cached = self._next_rendered.get(stage)
+        if cached is None:
+            body = b'{' + b','.join(
+                json.dumps(next_stage).encode('utf-8') + b':' + self._nodes[next_stage].render()
+                for next_stage in self.neighbors(stage) if next_stage in self._nodes
+            ) + b'}'
+            cached = (body, hashlib.sha256(body).hexdigest()[:16])
+            self._next_rendered[stage] = cached
+        return cached
+
+    def story_data(self) -> List[Dict[str, Any]]:
+        """The graph as raw story JSON (the shape of cityStory.json)"""
+        return [
+            {'stage': node.stage, 'description': node.description,
+             'options': _thaw(node.options), 'item_triggers': _thaw(node.item_triggers)}
+            for node in self._nodes.values()
+        ]
+
+    def analysis(self) -> CompiledStory:
+        """
+        Precomputed endings, distances, hints and item requirements. Uses the
+        compiled artifact when it was built from this exact story, else compiles now.
+        """
+        if self._analysis is None:
+            story_data = self.story_data()
+            compiled = None
+            try:
+                compiled = CompiledStory.load(COMPILED_FILE)
+            except (OSError, ValueError, KeyError) as e:
+                logger.info('No usable compiled story at %s: %s', COMPILED_FILE, e)
+            if compiled is None or compiled.fingerprint != story_fingerprint(story_data):
+                compiled = CompiledStory.from_story(story_data)
+            self._analysis = compiled
+        return self._analysis
+
+    def is_ending(self, stage: Optional[str]) -> bool:
+        """Ending check through the compiled story, by name if the story does not compile"""
+        try:
+            return self.analysis().is_ending(stage)
+        except StoryCompileError as e:
+            logger.error('Story does not compile, falling back to ending names: %s', e)
+            return is_ending_stage(stage)
+
+    def bundle(self):
+        """This graph's ``StoryBundle``, built on first use"""
+        if self._bundle is None:
+            from .story_bundle import build_story_bundle
+            self._bundle = build_story_bundle(self)
+        return self._bundle
+
+    @classmethod
+    def from_scenes(cls, scenes, version: Any = None) -> 'StoryGraph':
+        """Build a graph from ``Scene`` rows"""
+        return cls(
+            (SceneNode(scene.id, scene.stage, scene.description, scene.options,
+                       scene.item_triggers, scene.created_at) for scene in scenes),
+            version
+        )
+
+    @classmethod
+    def from_story_data(cls, story_data: List[Dict[str, Any]], version: Any = None) -> 'StoryGraph':
+        """Build a graph from the raw story JSON (scenes get no database id)"""
+        return cls(
+            (SceneNode(None, scene['stage'], scene.get('description'), scene.get('options'),
+                       scene.get('item_triggers')) for scene in story_data),
+            version
+        )
+
+    @classmethod
+    def from_file(cls, path: str = STORY_FILE) -> 'StoryGraph':
+        with open(path, 'r') as file:
+            story_data = json.load(file)
+        return cls.from_story_data(story_data, version=f'file:{os.path.getmtime(path)}')
+
+
+_graph: Optional[StoryGraph] = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def _current_version():
+    """Cheap stamp that changes whenever the scenes table is reseeded"""
+    from ..models import db, Scene, StoryVersion
+    version = db.session.query(StoryVersion.version).filter_by(id=StoryVersion.ROW_ID).scalar()
+    if version is not None:
+        return ('story_version', version)
+    # Not seeded through seed_story yet, fall back to a stamp of the table itself
+    count, max_id, max_created = db.session.query(
+        func.count(Scene.id), func.max(Scene.id), func.max(Scene.created_at)
+    ).filter(Scene.retired_at.is_(None)).one()
+    return (count, max_id, max_created.isoformat() if max_created else None)
+
+
+def _load(version) -> StoryGraph:
+    from ..models import Scene
+    scenes = Scene.query.filter(Scene.retired_at.is_(None)).all()
+    if not scenes:
+        logger.warning('Scenes table is empty, loading story graph from %s', STORY_FILE)
+        graph = StoryGraph.from_file()
+        graph.version = version
+        return graph
+    graph = StoryGraph.from_scenes(scenes, version)
+    logger.info('Loaded story graph with %d scenes (version %s)', len(graph), version)
+    return graph
+
+
+def get_story_graph() -> StoryGraph:
+    """
+    Return this worker's story graph, reloading it if the scenes changed.
+    The first graph a request sees is pinned on flask.g for the rest of it.
+    """
+    graph = g.get('story_graph')
+    if graph is None:
+        graph = g.story_graph = _latest_graph()
+    return graph
+
+
+def _latest_graph() -> StoryGraph:
+    global _graph, _checked_at
+
+    interval = current_app.config.get('STORY_GRAPH_CHECK_INTERVAL', 30)
+    now = time.monotonic()
+    graph = _graph
+    if graph is not None and now - _checked_at < interval:
+        return graph
+
+    with _lock:
+        if _graph is not None and now - _checked_at < interval:
+            return _graph
+        version = _current_version()
+        if _graph is None or _graph.version != version:
+            _graph = _load(version)
+        _checked_at = now
+        return _graph
+
+
+def invalidate_story_graph():
+    """Drop the cached graph so the next lookup reloads it"""
+    global _graph, _checked_at
+    with _lock:
+        _graph = None
+        _checked_at = 0.0
+    g.pop('story_graph', None)
@@ -0,0 +1,183 @@
+"""
+Idempotent, diff-based story seeding.
+
+Each scene is hashed over its content and only new or changed scenes are
+written, with one bulk upsert keyed by stage, so scene ids stay stable across
+deploys. Scenes dropped from the story are retired rather than deleted, so
+saves that point at them keep their scene_id. The hash of the whole story file is kept in ``story_version``;
+seeding the same file again does nothing. Everything runs in one transaction.
+
+``reload_story`` does the same at runtime (admin endpoint or file watch): it
+validates the new story, seeds it and swaps this worker's story graph. Other
+workers notice the bumped ``story_version`` on their next version check. A
+story uploaded to the admin endpoint is validated and seeded first and then
+written, with its compiled artifact, over this instance's story file; the
+stored hash is the hash of those file bytes. Deploys still seed from the story
+file in the repository.
+"""
+import hashlib
+import json
+import os
+import tempfile
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from ..models import db, Scene, Item, StoryVersion
+from .error_handling import ValidationError
+from .story_compiler import COMPILED_FILE, StoryCompileError, compile_story, scene_content_hash, validate_story
+from .story_graph import STORY_FILE, StoryGraph, get_story_graph, invalidate_story_graph
+
+
+class StoryValidationError(ValidationError):
+    """The story is malformed; details['errors'] lists every problem found"""
+    def __init__(self, errors: List[str]):
+        super().__init__('Story is invalid', {'errors': errors})
+
+
+class SeedResult(NamedTuple):
+    skipped: bool
+    inserted: int = 0
+    updated: int = 0
+    retired: int = 0
+    version: Optional[int] = None
+
+
+def source_hash(raw: bytes) -> str:
+    return hashlib.sha256(raw).hexdigest()
+
+
+def load_story_file(path: str = STORY_FILE):
+    """The raw bytes and parsed scenes of a story file"""
+    with open(path, 'rb') as file:
+        raw = file.read()
+    return raw, json.loads(raw)
+
+
+def _replace_file(path: str, raw: bytes):
+    """Write raw to path atomically, so readers never see half a file"""
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(raw)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def serialize_story(story_data: List[Dict[str, Any]]) -> Tuple[bytes, bytes]:
+    """Compile story_data; returns the story file bytes and the compiled artifact bytes"""
+    try:
+        artifact = compile_story(story_data)
+    except StoryCompileError as e:
+        raise StoryValidationError(e.errors)
+    raw = (json.dumps(story_data, indent=2, ensure_ascii=False) + '\n').encode('utf-8')
+    return raw, (json.dumps(artifact, separators=(',', ':')) + '\n').encode('utf-8')
+
+
+def write_story_files(raw: bytes, compiled_raw: bytes, path: str = STORY_FILE,
+                      compiled_path: str = COMPILED_FILE):
+    """Replace the story file and its artifact; the artifact goes first so a watcher never sees a stale one"""
+    _replace_file(compiled_path, compiled_raw)
+    _replace_file(path, raw)
+
+
+def scene_changes(story_data: List[Dict[str, Any]], existing: Dict[str, str],
+                  now: datetime) -> Tuple[List[Dict[str, Any]], Set[str]]:
+    """
+    Diff a story against the {stage: content_hash} already seeded. Returns the
+    scene rows to upsert (new, changed or returning scenes) and the stages to retire.
+    """
+    rows = []
+    for scene_data in story_data:
+        content_hash = scene_content_hash(scene_data)
+        if existing.get(scene_data['stage']) == content_hash:
+            continue
+        rows.append({
+            'stage': scene_data['stage'],
+            'description': scene_data.get('description'),
+            'options': scene_data.get('options'),
+            'item_triggers': scene_data.get('item_triggers'),
+            'content_hash': content_hash,
+            # A new created_at also changes the stamp workers use to reload the story graph
+            'created_at': now
+        })
+    retired = set(existing) - {scene_data['stage'] for scene_data in story_data}
+    return rows, retired
+
+
+def seed_story(story_data: List[Dict[str, Any]], story_hash: str, force: bool = False) -> SeedResult:
+    """
+    Bring the scenes table in line with story_data and commit. Skips all work when
+    story_hash matches the last seeded file, unless force is set.
+    """
+    errors = validate_story(story_data)
+    if errors:
+        raise StoryValidationError(errors)
+
+    # Lock the version row so two deploys cannot seed at the same time
+    state = db.session.query(StoryVersion).filter_by(id=StoryVersion.ROW_ID).with_for_update().one_or_none()
+    if state is None:
+        state = StoryVersion(id=StoryVersion.ROW_ID, version=0)
+        db.session.add(state)
+    elif state.source_hash == story_hash and not force:
+        db.session.rollback()
+        return SeedResult(skipped=True, version=state.version)
+
+    # Retired scenes count as missing, so a stage that comes back is upserted and revived
+    existing = dict(db.session.query(Scene.stage, Scene.content_hash).filter(Scene.retired_at.is_(None)))
+    now = datetime.utcnow()
+    rows, retired = scene_changes(story_data, existing, now)
+
+    if rows:
+        stmt = pg_insert(Scene.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['stage'],
+            set_={
+                'description': stmt.excluded.description,
+                'options': stmt.excluded.options,
+                'item_triggers': stmt.excluded.item_triggers,
+                'content_hash': stmt.excluded.content_hash,
+                'created_at': stmt.excluded.created_at,
+                'retired_at': None
+            }
+        )
+        db.session.execute(stmt, rows)
+
+    if retired:
+        Scene.query.filter(Scene.stage.in_(retired)).update({'retired_at': now}, synchronize_session=False)
+
+    # Catalog every item the story hands out or asks for
+    Item.ensure(StoryGraph.from_story_data(story_data).item_names())
+
+    changed = bool(rows or retired)
+    if changed:
+        state.version += 1
+    state.source_hash = story_hash
+    state.updated_at = now
+    db.session.commit()
+
+    updated = sum(1 for row in rows if row['stage'] in existing)
+    return SeedResult(False, len(rows) - updated, updated, len(retired), state.version)
+
+
+def reload_story(story_data: Optional[List[Dict[str, Any]]] = None, force: bool = False) -> SeedResult:
+    """
+    Validate and seed a new story (the story file when story_data is None), then
+    swap in the new story graph. Requests already running keep the graph they had.
+    """
+    compiled_raw = None
+    if story_data is None:
+        raw, story_data = load_story_file()
+    else:
+        raw, compiled_raw = serialize_story(story_data)
+    result = seed_story(story_data, source_hash(raw), force=force)
+    if compiled_raw is not None:
+        # Only once the database has the upload, so disk never runs ahead of it
+        write_story_files(raw, compiled_raw)
+    if not result.skipped:
+        invalidate_story_graph()
+        get_story_graph()
+    return result
@@ -0,0 +1,71 @@
+"""
+Optional story file watcher.
+
+With ``STORY_FILE_WATCH`` set, a background thread checks the story file's
+modification time every ``STORY_FILE_WATCH_INTERVAL`` seconds and reloads the
+story when it changes. Every worker runs its own watcher; seeding is keyed on
+the file hash and serialized on the ``story_version`` row, so only the first
+worker writes and the rest skip and pick the new version up from the database.
+"""
+import logging
+import os
+import threading
+from typing import Optional
+
+from .story_graph import STORY_FILE
+
+logger = logging.getLogger(__name__)
+
+
+class StoryFileWatcher:
+    def __init__(self, app=None, path: str = STORY_FILE):
+        self.app = None
+        self.path = path
+        self._mtime: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.interval = app.config.get('STORY_FILE_WATCH_INTERVAL', 5)
+        if app.config.get('STORY_FILE_WATCH', False) and self._thread is None:
+            self._mtime = self._current_mtime()
+            self._thread = threading.Thread(target=self._run, name='story-watch', daemon=True)
+            self._thread.start()
+
+    def _current_mtime(self) -> Optional[float]:
+        try:
+            return os.path.getmtime(self.path)
+        except OSError:
+            return None
+
+    def check(self) -> bool:
+        """Reload the story if the file changed since the last check; True when it did"""
+        mtime = self._current_mtime()
+        if mtime is None or mtime == self._mtime:
+            return False
+
+        # Remember this version even if it fails, so a broken file is reported
+        # once and retried only when it is edited again
+        self._mtime = mtime
+        from ..models import db
+        from .story_seed import reload_story
+        with self.app.app_context():
+            try:
+                result = reload_story()
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f'Failed to reload story from {self.path}: {e}')
+                return False
+        if not result.skipped:
+            logger.info('Reloaded story from %s (version %s)', self.path, result.version)
+        return True
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
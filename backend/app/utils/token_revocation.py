@@ -0,0 +1,101 @@
+"""
+In-process token revocation checks.
+
+Revoked tokens are stored by ``jti`` in the ``token_blocklist`` table. Each
+worker mirrors the table in a dict, at most every
+``TOKEN_REVOCATION_REFRESH_INTERVAL`` seconds, so the per-request check is a
+dict lookup. A refresh only pulls rows created after the newest one it has
+seen minus ``TOKEN_REVOCATION_OVERLAP`` seconds, because ids and timestamps are
+assigned before commit and a slow transaction can land behind newer rows.
+Every ``TOKEN_BLOCKLIST_PURGE_INTERVAL`` seconds expired rows are purged and
+the next refresh re-reads every unexpired row.
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from flask import current_app
+from sqlalchemy import delete
+
+logger = logging.getLogger(__name__)
+
+
+class RevocationCache:
+    def __init__(self):
+        self._revoked: Dict[str, datetime] = {}
+        self._seen_until: Optional[datetime] = None
+        self._refreshed_at = 0.0
+        self._purged_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        """Pull rows added since the last refresh (with some overlap) and drop expired entries"""
+        from ..models import TokenBlocklist
+        now = datetime.utcnow()
+        query = TokenBlocklist.query \
+            .with_entities(TokenBlocklist.jti, TokenBlocklist.expires_at, TokenBlocklist.created_at) \
+            .filter(TokenBlocklist.expires_at > now)
+        if self._seen_until is not None:
+            overlap = timedelta(seconds=current_app.config.get('TOKEN_REVOCATION_OVERLAP', 60))
+            query = query.filter(TokenBlocklist.created_at > self._seen_until - overlap)
+        for jti, expires_at, created_at in query.all():
+            self._revoked[jti] = expires_at
+            if self._seen_until is None or created_at > self._seen_until:
+                self._seen_until = created_at
+
+        for jti in [jti for jti, expires_at in self._revoked.items() if expires_at <= now]:
+            del self._revoked[jti]
+
+    def is_revoked(self, jti: str) -> bool:
+        config = current_app.config
+        now = time.monotonic()
+        if now - self._refreshed_at >= config.get('TOKEN_REVOCATION_REFRESH_INTERVAL', 5):
+            with self._lock:
+                if now - self._refreshed_at >= config.get('TOKEN_REVOCATION_REFRESH_INTERVAL', 5):
+                    self._refresh()
+                    self._refreshed_at = now
+                if now - self._purged_at >= config.get('TOKEN_BLOCKLIST_PURGE_INTERVAL', 3600):
+                    self._purged_at = now
+                    purge_expired_tokens()
+                    # Catch anything committed later than the overlap allows
+                    self._seen_until = None
+        return jti in self._revoked
+
+    def revoke(self, jti: str, expires_at: datetime):
+        from ..models import db, TokenBlocklist
+        db.session.add(TokenBlocklist(jti=jti, expires_at=expires_at))
+        db.session.commit()
+        # Visible to this worker right away; others pick it up on their next refresh
+        with self._lock:
+            self._revoked[jti] = expires_at
+
+
+_cache = RevocationCache()
+
+
+def is_token_revoked(jti: str) -> bool:
+    return _cache.is_revoked(jti)
+
+
+def revoke_token(jti: str, expires_at: datetime):
+    _cache.revoke(jti, expires_at)
+
+
+def purge_expired_tokens() -> int:
+    """Delete blocklist rows for tokens that have expired anyway"""
+    from ..models import db, TokenBlocklist
+    try:
+        # Own connection so a purge never commits the request's session
+        with db.engine.begin() as connection:
+            result = connection.execute(
+                delete(TokenBlocklist.__table__).where(TokenBlocklist.expires_at <= datetime.utcnow())
+            )
+        deleted = result.rowcount
+        if deleted:
+            logger.info('Purged %d expired token blocklist rows', deleted)
+        return deleted
+    except Exception as e:
+        logger.error(f'Failed to purge token blocklist: {e}')
+        return 0
@@ -34,6 +34,10 @@ flask db upgrade
 
 
 
+# Check the story graph before it reaches the database
+echo "🧭 Compiling story graph..."
+python compile_story.py
+
 # 8. Seed the database
 echo "🌱 Seeding database with story data..."
 python seed_scenes.py
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Validate the story graph and write the compiled artifact.
+
+Usage: python compile_story.py [story.json] [-o output.json] [--strict]
+
+Exits with status 1 when the story is invalid, or with --strict when the
+compiler reports warnings (unreachable scenes, dead ends, items never rewarded).
+"""
+import argparse
+import json
+import sys
+
+from app.utils.story_compiler import COMPILED_FILE, StoryCompileError, compile_story
+from app.utils.story_graph import STORY_FILE
+
+def main():
+    parser = argparse.ArgumentParser(description='Compile the story graph')
+    parser.add_argument('story', nargs='?', default=STORY_FILE, help='story JSON file')
+    parser.add_argument('-o', '--output', default=COMPILED_FILE, help='where to write the artifact')
+    parser.add_argument('--strict', action='store_true', help='treat warnings as errors')
+    args = parser.parse_args()
+    
+    with open(args.story, 'r') as file:
+        story_data = json.load(file)
+    
+    try:
+        artifact = compile_story(story_data)
+    except StoryCompileError as e:
+        print(f"❌ {args.story} is invalid:")
+        for error in e.errors:
+            print(f"   - {error}")
+        return 1
+    
+    for warning in artifact['warnings']:
+        print(f"⚠️  {warning}")
+    if args.strict and artifact['warnings']:
+        return 1
+    
+    with open(args.output, 'w') as file:
+        json.dump(artifact, file, separators=(',', ':'))
+        file.write('\n')
+    
+    print(f"✅ Compiled {len(artifact['stages'])} scenes, {len(artifact['endings'])} endings, "
+          f"{len(artifact['items'])} items into {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
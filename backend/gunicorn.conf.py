@@ -0,0 +1,8 @@
+# Gunicorn settings (render.yaml starts gunicorn with -c gunicorn.conf.py).
+# gthread workers serve several requests per process, so a login waiting on the
+# password hashing pool doesn't block the rest of the worker. Gunicorn already
+# reads WEB_CONCURRENCY (worker count) and PORT from the environment.
+import os
+
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '8'))
@@ -0,0 +1,66 @@
+"""Unique index on scenes.stage and integer scene reference on game_state
+
+Revision ID: 3c1f0a9d2b7e
+Revises: ccf4576385e6
+Create Date: 2025-08-12 10:14:03.211874
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c1f0a9d2b7e'
+down_revision = 'ccf4576385e6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Drop duplicate stages, keeping the oldest row, so the unique index can be built
+    op.execute("""
+        DELETE FROM scenes a
+        USING scenes b
+        WHERE a.stage = b.stage AND a.id > b.id;
+    """)
+    op.create_index('ix_scenes_stage', 'scenes', ['stage'], unique=True)
+
+    with op.batch_alter_table('game_state', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('scene_pk', sa.BigInteger(), nullable=True))
+
+    # Resolve the stored stage name to the scene's primary key ('start' stays NULL)
+    op.execute("""
+        UPDATE game_state
+        SET scene_pk = scenes.id
+        FROM scenes
+        WHERE scenes.stage = COALESCE(game_state.current_stage, game_state.scene_id);
+    """)
+
+    with op.batch_alter_table('game_state', schema=None) as batch_op:
+        batch_op.drop_column('scene_id')
+        batch_op.drop_column('current_stage')
+        batch_op.alter_column('scene_pk', new_column_name='scene_id')
+        batch_op.create_foreign_key(
+            'game_state_scene_id_fkey', 'scenes', ['scene_id'], ['id'], ondelete='SET NULL'
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('game_state', schema=None) as batch_op:
+        batch_op.drop_constraint('game_state_scene_id_fkey', type_='foreignkey')
+        batch_op.alter_column('scene_id', new_column_name='scene_pk')
+        batch_op.add_column(sa.Column('current_stage', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('scene_id', sa.Text(), nullable=True))
+
+    op.execute("UPDATE game_state SET current_stage = 'start', scene_id = 'start';")
+    op.execute("""
+        UPDATE game_state
+        SET current_stage = scenes.stage, scene_id = scenes.stage
+        FROM scenes
+        WHERE scenes.id = game_state.scene_pk;
+    """)
+
+    with op.batch_alter_table('game_state', schema=None) as batch_op:
+        batch_op.drop_column('scene_pk')
+
+    op.drop_index('ix_scenes_stage', table_name='scenes')
@@ -0,0 +1,74 @@
+"""Key token blocklist by jti with an expiry column
+
+Revision ID: 7d4e2b91c0a6
+Revises: 3c1f0a9d2b7e
+Create Date: 2025-08-13 09:42:17.508331
+
+"""
+import base64
+import json
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d4e2b91c0a6'
+down_revision = '3c1f0a9d2b7e'
+branch_labels = None
+depends_on = None
+
+
+def _decode_claims(token):
+    """Read the claims of a stored raw JWT without verifying it"""
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        return json.loads(base64.urlsafe_b64decode(payload))
+    except (IndexError, ValueError):
+        return {}
+
+
+def upgrade():
+    with op.batch_alter_table('token_blocklist', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('jti', sa.String(length=36), nullable=True))
+        batch_op.add_column(sa.Column('expires_at', sa.DateTime(), nullable=True))
+
+    # Backfill jti/exp from the raw tokens that logout used to store
+    connection = op.get_bind()
+    rows = connection.execute(sa.text('SELECT id, token FROM token_blocklist')).fetchall()
+    for row_id, token in rows:
+        claims = _decode_claims(token)
+        if 'jti' not in claims or 'exp' not in claims:
+            connection.execute(sa.text('DELETE FROM token_blocklist WHERE id = :id'), {'id': row_id})
+            continue
+        connection.execute(
+            sa.text('UPDATE token_blocklist SET jti = :jti, expires_at = :expires_at WHERE id = :id'),
+            {'jti': claims['jti'], 'expires_at': datetime.utcfromtimestamp(claims['exp']), 'id': row_id}
+        )
+    # Rows for tokens that have expired anyway are not needed
+    connection.execute(
+        sa.text('DELETE FROM token_blocklist WHERE expires_at <= :now'),
+        {'now': datetime.utcnow()}
+    )
+
+    with op.batch_alter_table('token_blocklist', schema=None) as batch_op:
+        batch_op.drop_constraint('token_blocklist_token_key', type_='unique')
+        batch_op.drop_column('token')
+        batch_op.alter_column('jti', existing_type=sa.String(length=36), nullable=False)
+        batch_op.alter_column('expires_at', existing_type=sa.DateTime(), nullable=False)
+        batch_op.create_unique_constraint('token_blocklist_jti_key', ['jti'])
+        batch_op.create_index('ix_token_blocklist_expires_at', ['expires_at'], unique=False)
+
+
+def downgrade():
+    # Raw tokens cannot be recovered from a jti, so revocations are dropped
+    op.execute('DELETE FROM token_blocklist')
+    with op.batch_alter_table('token_blocklist', schema=None) as batch_op:
+        batch_op.drop_index('ix_token_blocklist_expires_at')
+        batch_op.drop_constraint('token_blocklist_jti_key', type_='unique')
+        batch_op.drop_column('expires_at')
+        batch_op.drop_column('jti')
+        batch_op.add_column(sa.Column('token', sa.Text(), nullable=False))
+        batch_op.create_unique_constraint('token_blocklist_token_key', ['token'])
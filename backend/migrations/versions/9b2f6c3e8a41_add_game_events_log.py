@@ -0,0 +1,67 @@
+"""Add append-only game_events log
+
+Revision ID: 9b2f6c3e8a41
+Revises: 7d4e2b91c0a6
+Create Date: 2025-08-14 15:27:48.903162
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b2f6c3e8a41'
+down_revision = '7d4e2b91c0a6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('game_events',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('character_id', sa.BigInteger(), nullable=False),
+    sa.Column('seq', sa.Integer(), nullable=False),
+    sa.Column('stage', sa.Text(), nullable=False),
+    sa.Column('choice_index', sa.Integer(), nullable=True),
+    sa.Column('next_stage', sa.Text(), nullable=False),
+    sa.Column('stat_deltas', sa.JSON(), nullable=True),
+    sa.Column('reward', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['character_id'], ['characters.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('character_id', 'seq', name='uq_game_events_character_seq')
+    )
+    # Existing choice_history stays as the snapshot; new turns start at seq 1
+    with op.batch_alter_table('game_state', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('snapshot_seq', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('last_event_seq', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    # Fold each character's events back into its choice_history before dropping them
+    op.execute("""
+        UPDATE game_state
+        SET choice_history = (
+            COALESCE(game_state.choice_history::jsonb, '[]'::jsonb) || tail.events
+        )::json
+        FROM (
+            SELECT e.character_id, jsonb_agg(jsonb_build_object(
+                'seq', e.seq,
+                'stage', e.stage,
+                'choice_index', e.choice_index,
+                'next', e.next_stage,
+                'stat_changes', e.stat_deltas,
+                'reward', e.reward,
+                'created_at', e.created_at
+            ) ORDER BY e.seq) AS events
+            FROM game_events e
+            JOIN game_state gs ON gs.character_id = e.character_id
+            WHERE e.seq > gs.snapshot_seq
+            GROUP BY e.character_id
+        ) AS tail
+        WHERE tail.character_id = game_state.character_id;
+    """)
+    with op.batch_alter_table('game_state', schema=None) as batch_op:
+        batch_op.drop_column('last_event_seq')
+        batch_op.drop_column('snapshot_seq')
+    op.drop_table('game_events')
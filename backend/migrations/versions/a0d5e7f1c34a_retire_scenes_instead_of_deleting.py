@@ -0,0 +1,26 @@
+"""Retire scenes dropped from the story instead of deleting them
+
+Revision ID: a0d5e7f1c34a
+Revises: f8c4d6e0b239
+Create Date: 2025-08-26 10:12:44.219301
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a0d5e7f1c34a'
+down_revision = 'f8c4d6e0b239'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('scenes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('retired_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('scenes', schema=None) as batch_op:
+        batch_op.drop_column('retired_at')
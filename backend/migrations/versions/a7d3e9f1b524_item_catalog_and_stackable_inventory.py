@@ -0,0 +1,102 @@
+"""Item catalog and stackable inventory
+
+Revision ID: a7d3e9f1b524
+Revises: f2c6b8e0a913
+Create Date: 2025-08-20 11:05:17.642310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d3e9f1b524'
+down_revision = 'f2c6b8e0a913'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('items',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('name', sa.Text(), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_items_name', 'items', ['name'], unique=True)
+
+    # Catalog the names already held, keeping one description per item
+    op.execute("""
+        INSERT INTO items (name, description)
+        SELECT item_name, MAX(NULLIF(description, ''))
+        FROM inventory
+        GROUP BY item_name;
+    """)
+
+    with op.batch_alter_table('inventory', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('item_id', sa.BigInteger(), nullable=True))
+        batch_op.add_column(sa.Column('quantity', sa.Integer(), server_default='1', nullable=False))
+
+    op.execute("""
+        UPDATE inventory
+        SET item_id = items.id
+        FROM items
+        WHERE items.name = inventory.item_name;
+    """)
+
+    # Collapse duplicate pickups into the oldest row of each stack
+    op.execute("""
+        UPDATE inventory
+        SET quantity = stacks.quantity
+        FROM (
+            SELECT MIN(id) AS id, COUNT(*) AS quantity
+            FROM inventory
+            GROUP BY character_id, used, item_id
+        ) stacks
+        WHERE stacks.id = inventory.id;
+    """)
+    op.execute("""
+        DELETE FROM inventory a
+        USING inventory b
+        WHERE a.character_id = b.character_id
+          AND a.used = b.used
+          AND a.item_id = b.item_id
+          AND a.id > b.id;
+    """)
+
+    with op.batch_alter_table('inventory', schema=None) as batch_op:
+        batch_op.alter_column('item_id', existing_type=sa.BigInteger(), nullable=False)
+        batch_op.create_foreign_key('inventory_item_id_fkey', 'items', ['item_id'], ['id'])
+        batch_op.create_unique_constraint('uq_inventory_character_used_item', ['character_id', 'used', 'item_id'])
+        batch_op.drop_column('description')
+        batch_op.drop_column('item_name')
+
+
+def downgrade():
+    with op.batch_alter_table('inventory', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('item_name', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('description', sa.Text(), nullable=True))
+        batch_op.drop_constraint('uq_inventory_character_used_item', type_='unique')
+        batch_op.drop_constraint('inventory_item_id_fkey', type_='foreignkey')
+
+    op.execute("""
+        UPDATE inventory
+        SET item_name = items.name, description = items.description
+        FROM items
+        WHERE items.id = inventory.item_id;
+    """)
+
+    # Expand stacks back into one row per item
+    op.execute("""
+        INSERT INTO inventory (character_id, item_id, quantity, used, created_at, item_name, description)
+        SELECT character_id, item_id, 1, used, created_at, item_name, description
+        FROM inventory, generate_series(2, inventory.quantity);
+    """)
+
+    with op.batch_alter_table('inventory', schema=None) as batch_op:
+        batch_op.alter_column('item_name', existing_type=sa.Text(), nullable=False)
+        batch_op.drop_column('quantity')
+        batch_op.drop_column('item_id')
+
+    op.drop_index('ix_items_name', table_name='items')
+    op.drop_table('items')
@@ -0,0 +1,26 @@
+"""Add inventory version counter to characters
+
+Revision ID: b3e8f0c2d615
+Revises: a7d3e9f1b524
+Create Date: 2025-08-21 09:48:52.307114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3e8f0c2d615'
+down_revision = 'a7d3e9f1b524'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('characters', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('inventory_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('characters', schema=None) as batch_op:
+        batch_op.drop_column('inventory_version')
@@ -0,0 +1,40 @@
+"""One game_state row per character
+
+Revision ID: c4a8d1f7e290
+Revises: 9b2f6c3e8a41
+Create Date: 2025-08-15 11:03:26.774519
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4a8d1f7e290'
+down_revision = '9b2f6c3e8a41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keep only the most recently updated save of each character
+    op.execute("""
+        DELETE FROM game_state
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (
+                    PARTITION BY character_id
+                    ORDER BY last_updated DESC, id DESC
+                ) AS rank
+                FROM game_state
+            ) AS ranked
+            WHERE ranked.rank > 1
+        );
+    """)
+    with op.batch_alter_table('game_state', schema=None) as batch_op:
+        batch_op.create_unique_constraint('game_state_character_id_key', ['character_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('game_state', schema=None) as batch_op:
+        batch_op.drop_constraint('game_state_character_id_key', type_='unique')
@@ -0,0 +1,36 @@
+"""Scene content hashes and story version row
+
+Revision ID: c5f1a2d7e836
+Revises: b3e8f0c2d615
+Create Date: 2025-08-22 14:31:06.558207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5f1a2d7e836'
+down_revision = 'b3e8f0c2d615'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('story_version',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('source_hash', sa.String(length=64), nullable=True),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # Existing scenes get no hash, so the next seed rewrites them once
+    with op.batch_alter_table('scenes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('scenes', schema=None) as batch_op:
+        batch_op.drop_column('content_hash')
+
+    op.drop_table('story_version')
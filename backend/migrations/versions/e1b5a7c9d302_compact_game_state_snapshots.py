@@ -0,0 +1,52 @@
+"""Store game_state snapshots with the compact codec
+
+Revision ID: e1b5a7c9d302
+Revises: c4a8d1f7e290
+Create Date: 2025-08-18 14:51:09.316247
+
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.snapshot_codec import encode_snapshot, decode_snapshot
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1b5a7c9d302'
+down_revision = 'c4a8d1f7e290'
+branch_labels = None
+depends_on = None
+
+SNAPSHOT_COLUMNS = ('choice_history', 'current_stats', 'inventory_snapshot')
+
+
+def _convert(source_type, target_type, convert):
+    """Copy every snapshot column into a column of the new type, converting each value"""
+    with op.batch_alter_table('game_state', schema=None) as batch_op:
+        for column in SNAPSHOT_COLUMNS:
+            batch_op.add_column(sa.Column(f'{column}_new', target_type, nullable=True))
+
+    connection = op.get_bind()
+    source = sa.table('game_state', sa.column('id'), *(sa.column(c, source_type) for c in SNAPSHOT_COLUMNS))
+    target = sa.table('game_state', sa.column('id'), *(sa.column(f'{c}_new', target_type) for c in SNAPSHOT_COLUMNS))
+    for row in connection.execute(sa.select(source)).mappings().all():
+        connection.execute(
+            target.update().where(target.c.id == row['id']).values(
+                {f'{c}_new': convert(row[c]) for c in SNAPSHOT_COLUMNS}
+            )
+        )
+
+    with op.batch_alter_table('game_state', schema=None) as batch_op:
+        for column in SNAPSHOT_COLUMNS:
+            batch_op.drop_column(column)
+            batch_op.alter_column(f'{column}_new', new_column_name=column)
+
+
+def upgrade():
+    _convert(sa.JSON(), sa.LargeBinary(), encode_snapshot)
+
+
+def downgrade():
+    _convert(sa.LargeBinary(), sa.JSON(), decode_snapshot)
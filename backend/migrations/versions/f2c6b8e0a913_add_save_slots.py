@@ -0,0 +1,38 @@
+"""Add named save slots
+
+Revision ID: f2c6b8e0a913
+Revises: e1b5a7c9d302
+Create Date: 2025-08-19 16:22:40.118903
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2c6b8e0a913'
+down_revision = 'e1b5a7c9d302'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('save_slots',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('character_id', sa.BigInteger(), nullable=False),
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.Column('scene_id', sa.BigInteger(), nullable=True),
+    sa.Column('fear', sa.Integer(), nullable=True),
+    sa.Column('sanity', sa.Integer(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('choice_history', sa.LargeBinary(), nullable=True),
+    sa.Column('inventory_snapshot', sa.LargeBinary(), nullable=True),
+    sa.ForeignKeyConstraint(['character_id'], ['characters.id'], ),
+    sa.ForeignKeyConstraint(['scene_id'], ['scenes.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('character_id', 'name', name='uq_save_slots_character_name')
+    )
+
+
+def downgrade():
+    op.drop_table('save_slots')
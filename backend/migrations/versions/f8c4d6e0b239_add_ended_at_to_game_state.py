@@ -0,0 +1,26 @@
+"""Mark ended games on game_state instead of deleting the row
+
+Revision ID: f8c4d6e0b239
+Revises: c5f1a2d7e836
+Create Date: 2025-08-25 14:05:31.662870
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f8c4d6e0b239'
+down_revision = 'c5f1a2d7e836'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('game_state', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('ended_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('game_state', schema=None) as batch_op:
+        batch_op.drop_column('ended_at')
@@ -1,38 +1,22 @@
-import json
-import os
-from app import create_app, db
-from app.models import Scene
-from sqlalchemy import text
+import sys
+from app import create_app
+from app.utils.story_seed import load_story_file, source_hash, seed_story
 
-def seed_scenes():
+def seed_scenes(force=False):
     app = create_app()
     
     with app.app_context():
         # Load the JSON data
-        json_path = os.path.join(os.path.dirname(__file__), 'app', 'cityStory.json')
+        raw, story_data = load_story_file()
         
-        with open(json_path, 'r') as file:
-            story_data = json.load(file)
+        # Only new or changed scenes are written; an unchanged file is skipped
+        result = seed_story(story_data, source_hash(raw), force=force)
         
-        # Clear existing scenes and reset sequence
-        Scene.query.delete()
-        db.session.execute(text('ALTER SEQUENCE scenes_id_seq RESTART WITH 1'))
-        
-        # Insert scenes from the JSON data
-        for scene_data in story_data:
-            scene = Scene(
-                stage=scene_data['stage'],
-                description=scene_data['description'],
-                options=scene_data['options'],
-                item_triggers=scene_data.get('item_triggers', None)
-            )
-            
-            db.session.add(scene)
-        
-        # Commit all changes
-        db.session.commit()
-        
-        print(f"Successfully seeded {len(story_data)} scenes with IDs starting at 1")
+        if result.skipped:
+            print(f"Story unchanged (version {result.version}), nothing to seed")
+        else:
+            print(f"Seeded {len(story_data)} scenes: {result.inserted} new, {result.updated} changed, "
+                  f"{result.retired} retired (version {result.version})")
 
 if __name__ == '__main__':
-    seed_scenes() 
\ No newline at end of file
+    seed_scenes(force='--force' in sys.argv)
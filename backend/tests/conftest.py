@@ -0,0 +1,96 @@
+import os
+import sys
+
+import pytest
+
+# Tests import the backend the way run.py does: ``from app... import ...``
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Tests that need the database run against an empty Postgres database named by
+# TEST_DATABASE_URL (its tables are dropped and recreated) and skip without one.
+# Config reads DATABASE_URL at import time, so it is set before the app loads.
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+if TEST_DATABASE_URL:
+    os.environ['DATABASE_URL'] = TEST_DATABASE_URL
+
+
+@pytest.fixture(scope='session')
+def app():
+    if not TEST_DATABASE_URL:
+        pytest.skip('TEST_DATABASE_URL is not set')
+    from app import create_app
+    from app.models import db
+
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def db_session(app):
+    """App context with empty tables, emptied again after the test"""
+    from app.models import db
+    from app.utils.story_graph import invalidate_story_graph
+
+    with app.app_context():
+        yield db.session
+        db.session.rollback()
+        invalidate_story_graph()
+        db.session.execute(db.text('TRUNCATE {} RESTART IDENTITY CASCADE'.format(
+            ', '.join(table.name for table in db.metadata.sorted_tables)
+        )))
+        db.session.commit()
+        db.session.remove()
+
+
+@pytest.fixture
+def character(db_session):
+    from app.models import Character, Users
+
+    user = Users(username='tester', email='tester@example.com', password_hash='x')
+    db_session.add(user)
+    db_session.flush()
+    character = Character(user_id=user.id, name='Tester')
+    db_session.add(character)
+    db_session.commit()
+    return character
+
+
+@pytest.fixture
+def story(db_session):
+    """The scenes of cityStory.json, seeded and loaded as the story graph"""
+    from app.utils.story_graph import get_story_graph
+    from app.utils.story_seed import reload_story
+
+    reload_story()
+    return get_story_graph()
+
+
+@pytest.fixture
+def game_state(db_session, character, story):
+    from app.models import GameState
+
+    game_state = GameState(character_id=character.id, choice_history=[],
+                           current_stats={'fear': 0, 'sanity': 100}, inventory_snapshot=[])
+    db_session.add(game_state)
+    db_session.commit()
+    return game_state
+
+
+@pytest.fixture
+def client(app, db_session):
+    """Test client for requests made inside the db_session app context"""
+    return app.test_client()
+
+
+@pytest.fixture
+def auth_headers(character):
+    from flask_jwt_extended import create_access_token
+
+    return {'Authorization': f'Bearer {create_access_token(identity=character.user_id)}'}
@@ -0,0 +1,48 @@
+from app.models import Inventory
+from app.models.game_state import START_SCENES, START_STAGE
+from app.routes.game_routes import reset_progress
+
+
+def test_end_game_resets_the_save_and_marks_it_ended(db_session, game_state):
+    game_state.current_stage = 'start_subway'
+    game_state.current_stats = {'fear': 40, 'sanity': 60}
+    game_state.inventory_snapshot = [{'item_name': 'Glowing Scale', 'quantity': 1, 'used': False}]
+    db_session.commit()
+    game_state.append_event('start_subway', 'subway_sleeping', 0)
+
+    game_state.end_game()
+    db_session.commit()
+
+    assert game_state.ended_at is not None
+    assert game_state.current_stage == START_STAGE
+    assert game_state.current_stats == {'fear': 0, 'sanity': 100}
+    assert game_state.inventory_snapshot == []
+    assert game_state.get_choice_history() == []
+
+
+def test_a_new_playthrough_clears_the_ended_mark(db_session, game_state):
+    game_state.end_game()
+    db_session.commit()
+
+    assert game_state.assign_start_scene()
+    db_session.commit()
+
+    assert game_state.ended_at is None
+    assert game_state.current_stage in START_SCENES
+    # Only a game at the start placeholder moves
+    assert not game_state.assign_start_scene()
+
+
+def test_an_ending_turn_ends_the_save(db_session, character, game_state):
+    game_state.current_stage = 'start_subway'
+    Inventory.add_by_name(character.id, 'Glowing Scale')
+    character.fear = 70
+    db_session.commit()
+
+    reset_progress(character, game_state)
+    db_session.commit()
+
+    assert game_state.ended_at is not None
+    assert game_state.current_stage == START_STAGE
+    assert (character.fear, character.sanity) == (0, 100)
+    assert Inventory.unused(character.id) == []
@@ -0,0 +1,44 @@
+import gzip
+
+import pytest
+from flask import Flask
+
+from app.utils.http_cache import json_bytes, not_modified, splice_json, with_etag
+
+BODY = b'{"stage":"hall"}'
+
+
+@pytest.fixture
+def app():
+    return Flask(__name__)
+
+
+def test_gzip_and_identity_bodies_get_different_etags(app):
+    with app.test_request_context(headers={'Accept-Encoding': 'gzip'}):
+        gzipped = with_etag(json_bytes(BODY, compressed_body=gzip.compress(BODY)), 'abc')
+    with app.test_request_context():
+        identity = with_etag(json_bytes(BODY, compressed_body=gzip.compress(BODY)), 'abc')
+
+    assert gzipped.headers['Content-Encoding'] == 'gzip'
+    assert gzipped.get_etag() == ('abc-gz', False)
+    assert identity.get_etag() == ('abc', False)
+    assert 'Accept-Encoding' in gzipped.vary and 'Accept-Encoding' in identity.vary
+
+
+def test_not_modified_matches_the_encoding_the_client_accepts(app):
+    with app.test_request_context(headers={'Accept-Encoding': 'gzip', 'If-None-Match': '"abc-gz"'}):
+        response = not_modified('abc', compressible=True)
+        assert response.status_code == 304
+        assert response.get_etag() == ('abc-gz', False)
+        assert 'Accept-Encoding' in response.vary
+    with app.test_request_context(headers={'Accept-Encoding': 'gzip', 'If-None-Match': '"abc"'}):
+        assert not_modified('abc', compressible=True) is None
+    with app.test_request_context(headers={'If-None-Match': '"abc"'}):
+        assert not_modified('abc', compressible=True).status_code == 304
+        assert not_modified('abc').status_code == 304
+
+
+def test_splice_json_adds_raw_fields():
+    assert splice_json(BODY, {'next_scenes': b'{}', 'extra': None}) == b'{"stage":"hall","next_scenes":{},"extra":null}'
+    assert splice_json(b'{}', {'a': b'1'}) == b'{"a":1}'
+    assert splice_json(BODY, {}) == BODY
@@ -0,0 +1,70 @@
+from app.models import Inventory
+from app.routes.inventory_routes import apply_inventory_operations
+
+
+def snapshot(character_id):
+    return sorted(
+        (stack.item_name, stack.quantity, stack.used)
+        for stack in Inventory.query.filter_by(character_id=character_id).all()
+    )
+
+
+def restore_operations(saved):
+    """The operations useGamePersistence sends to restore a saved inventory snapshot"""
+    return (
+        [{'op': 'reset'}]
+        + [{'op': 'add', 'item_name': item['item_name'], 'quantity': item['quantity']} for item in saved]
+        + [{'op': 'use', 'item_name': item['item_name'], 'quantity': item['quantity']} for item in saved if item['used']]
+    )
+
+
+def test_restoring_a_save_keeps_stacked_quantities(db_session, character):
+    apply_inventory_operations(character.id, [
+        {'op': 'add', 'item_name': 'Glowing Scale', 'quantity': 5},
+        {'op': 'use', 'item_name': 'Glowing Scale', 'quantity': 2},
+        {'op': 'add', 'item_name': 'Subway Token', 'quantity': 3},
+    ])
+    db_session.commit()
+    saved = [stack.to_dict() for stack in Inventory.query.filter_by(character_id=character.id).all()]
+    before = snapshot(character.id)
+
+    apply_inventory_operations(character.id, [{'op': 'add', 'item_name': 'Rusty Key'}])
+    apply_inventory_operations(character.id, restore_operations(saved))
+    db_session.commit()
+
+    assert before == [('Glowing Scale', 2, True), ('Glowing Scale', 3, False), ('Subway Token', 3, False)]
+    assert snapshot(character.id) == before
+
+
+def post_batch(client, auth_headers, operations):
+    return client.post('/api/inventory/batch', json={'operations': operations}, headers=auth_headers)
+
+
+def test_batch_endpoint_returns_the_delta(db_session, client, auth_headers, character):
+    response = post_batch(client, auth_headers, [
+        {'op': 'add', 'item_name': 'Subway Token', 'quantity': 2},
+        {'op': 'use', 'item_name': 'Subway Token'},
+    ])
+
+    assert response.status_code == 200
+    delta = response.get_json()['inventory_delta']
+    assert sorted((item['item_name'], item['quantity'], item['used']) for item in delta['updated']) == [
+        ('Subway Token', 1, False), ('Subway Token', 1, True)
+    ]
+    assert delta['removed'] == [] and delta['reset'] is False
+
+
+def test_batch_endpoint_applies_nothing_when_an_operation_fails(db_session, client, auth_headers, character):
+    response = post_batch(client, auth_headers, [
+        {'op': 'add', 'item_name': 'Subway Token'},
+        {'op': 'use', 'item_name': 'Subway Token', 'quantity': 2},
+    ])
+
+    assert response.status_code == 400
+    db_session.rollback()
+    assert snapshot(character.id) == []
+
+
+def test_batch_endpoint_rejects_a_body_without_operations(db_session, client, auth_headers, character):
+    assert post_batch(client, auth_headers, None).status_code == 400
+    assert post_batch(client, auth_headers, [{'op': 'explode'}]).status_code == 400
@@ -0,0 +1,30 @@
+from app.utils.inventory_checks import option_availability, required_items_for, validate_required_items
+
+OPTIONS = [
+    {'text': 'Walk', 'next': 'hall'},
+    {'text': 'Unlock', 'next': 'vault', 'required_item': 'Key'},
+    {'text': 'Ritual', 'next': 'altar', 'required_item': 'Candle', 'required_items': ['Candle', 'Chalk']},
+]
+
+
+def test_required_items_merges_both_fields_without_duplicates():
+    assert required_items_for(OPTIONS[0]) == []
+    assert required_items_for(OPTIONS[1]) == ['Key']
+    assert required_items_for(OPTIONS[2]) == ['Candle', 'Chalk']
+    assert required_items_for(None) == []
+
+
+def test_validate_required_items_lists_what_is_missing():
+    assert validate_required_items(OPTIONS[0], 1, set()) == (True, [])
+    assert validate_required_items(OPTIONS[1], 1, {'Key'}) == (True, [])
+    assert validate_required_items(OPTIONS[2], 1, {'Candle'}) == (False, ['Chalk'])
+
+
+def test_option_availability_follows_option_order():
+    # owned_items is given, so nothing touches the database
+    assert option_availability(OPTIONS, 1, {'Chalk'}) == [
+        {'available': True, 'missing_items': []},
+        {'available': False, 'missing_items': ['Key']},
+        {'available': False, 'missing_items': ['Candle']},
+    ]
+    assert option_availability(None, 1, set()) == []
@@ -0,0 +1,45 @@
+import pytest
+from flask import Flask
+from flask_bcrypt import Bcrypt
+
+from app.utils.passwords import MIN_LOG_ROUNDS, PasswordHasher, PasswordHasherBusy
+
+
+def make_hasher(**config):
+    app = Flask(__name__)
+    app.config.update({'BCRYPT_LOG_ROUNDS': 6, 'PASSWORD_HASH_WORKERS': 1, 'PASSWORD_HASH_QUEUE_SIZE': 0, **config})
+    return PasswordHasher(app, Bcrypt(app))
+
+
+def test_hash_and_verify():
+    hasher = make_hasher()
+    password_hash = hasher.hash('hunter22')
+    assert password_hash.startswith('$2b$06$')
+    assert hasher.verify(password_hash, 'hunter22')
+    assert not hasher.verify(password_hash, 'hunter23')
+
+
+def test_only_cheaper_hashes_are_rehashed():
+    hasher = make_hasher()
+    assert hasher.needs_rehash('$2b$05$' + 'x' * 53)
+    assert not hasher.needs_rehash('$2b$06$' + 'x' * 53)
+    assert not hasher.needs_rehash('$2b$12$' + 'x' * 53)
+    assert hasher.needs_rehash('not a bcrypt hash')
+
+
+def test_cheap_mode_never_downgrades_stored_hashes():
+    hasher = make_hasher(PASSWORD_HASH_CHEAP_MODE=True)
+    assert hasher.hash('hunter22').startswith(f'$2b$0{MIN_LOG_ROUNDS}$')
+    assert not hasher.needs_rehash('$2b$12$' + 'x' * 53)
+    assert not hasher.needs_rehash('$2b$05$' + 'x' * 53)
+
+
+def test_full_pool_fails_fast():
+    hasher = make_hasher()
+    assert hasher._slots.acquire(blocking=False)
+    try:
+        with pytest.raises(PasswordHasherBusy) as excinfo:
+            hasher.hash('hunter22')
+        assert excinfo.value.status_code == 503
+    finally:
+        hasher._slots.release()
@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+from app.utils.snapshot_codec import FORMAT_V1, decode_snapshot, encode_snapshot
+
+
+def inventory_snapshot(count):
+    return [
+        {'id': i, 'character_id': 7, 'item_name': 'Glowing Scale', 'description': 'Reward from story choice',
+         'used': i % 2 == 0, 'created_at': '2025-08-01T12:00:00'}
+        for i in range(count)
+    ]
+
+
+@pytest.mark.parametrize('value', [
+    {'fear': 3, 'sanity': 97},
+    [],
+    inventory_snapshot(5),
+    [{'seq': 1, 'stage': 'start_subway', 'choice_index': 0, 'next': 'hall', 'stat_changes': None, 'reward': None}],
+    'plain string',
+])
+def test_round_trip(value):
+    blob = encode_snapshot(value)
+    assert blob[0] == FORMAT_V1
+    assert decode_snapshot(blob) == value
+
+
+def test_none_is_stored_as_null():
+    assert encode_snapshot(None) is None
+    assert decode_snapshot(None) is None
+
+
+def test_decodes_memoryview_from_the_driver():
+    value = {'fear': 1, 'sanity': 2}
+    assert decode_snapshot(memoryview(encode_snapshot(value))) == value
+
+
+def test_smaller_than_plain_json():
+    value = inventory_snapshot(20)
+    assert len(encode_snapshot(value)) < len(json.dumps(value)) / 3
+
+
+def test_unknown_version_is_rejected():
+    blob = bytes([FORMAT_V1 + 1]) + encode_snapshot({'fear': 0})[1:]
+    with pytest.raises(ValueError):
+        decode_snapshot(blob)
@@ -0,0 +1,40 @@
+from types import MappingProxyType
+
+import pytest
+
+from app.models.characters import STAT_MAX, STAT_MIN, STAT_VARIANCE, stat_delta, with_variance
+from app.utils.error_handling import ValidationError
+
+
+def test_missing_stats_are_zero():
+    assert stat_delta({'fear': 3}) == {'fear': 3, 'sanity': 0}
+    assert stat_delta({'fear': None, 'sanity': -2.0}) == {'fear': 0, 'sanity': -2}
+
+
+def test_read_only_story_deltas_are_accepted():
+    assert stat_delta(MappingProxyType({'sanity': -2})) == {'fear': 0, 'sanity': -2}
+
+
+def test_changes_are_capped_to_the_stat_range():
+    span = STAT_MAX - STAT_MIN
+    assert stat_delta({'fear': 10 ** 12, 'sanity': -float('inf')}) == {'fear': span, 'sanity': -span}
+
+
+@pytest.mark.parametrize('delta', [
+    {'fear': 'lots'},
+    {'sanity': [1]},
+    {'fear': True},
+    {'fear': float('nan')},
+    ['fear', 1],
+])
+def test_malformed_deltas_raise_validation_error(delta):
+    with pytest.raises(ValidationError) as excinfo:
+        stat_delta(delta)
+    assert excinfo.value.status_code == 400
+
+
+def test_with_variance_stays_within_the_variance():
+    for _ in range(50):
+        varied = with_variance({'fear': 5})
+        assert 5 - STAT_VARIANCE <= varied['fear'] <= 5 + STAT_VARIANCE
+        assert -STAT_VARIANCE <= varied['sanity'] <= STAT_VARIANCE
@@ -0,0 +1,118 @@
+import json
+
+import pytest
+
+from app.utils.story_compiler import (
+    CompiledStory,
+    StoryCompileError,
+    compile_story,
+    scene_content_hash,
+    story_fingerprint,
+    validate_story,
+)
+
+
+def make_story():
+    """start -> hall -> ending_good; the short way from start needs a key; ending_bad loops back"""
+    return [
+        {'stage': 'start_gate', 'description': 'A gate.', 'options': [
+            {'text': 'Walk around', 'next': 'hall'},
+            {'text': 'Unlock the gate', 'next': 'ending_good', 'required_item': 'Key'},
+        ], 'item_triggers': [{'item': 'Key', 'next': 'ending_good'}]},
+        {'stage': 'hall', 'description': 'A hall.', 'options': [
+            {'text': 'Take the key', 'next': 'ending_good', 'reward': 'Key'},
+            {'text': 'Fall asleep', 'next': 'ending_bad'},
+        ]},
+        {'stage': 'ending_good', 'description': 'Out.', 'options': []},
+        {'stage': 'ending_bad', 'description': 'Stuck.', 'options': [
+            {'text': 'Try again', 'next': 'ending_good'},
+        ]},
+        {'stage': 'attic', 'description': 'Nobody comes here.', 'options': [
+            {'text': 'Leave', 'next': 'hall'},
+        ]},
+    ]
+
+
+@pytest.fixture
+def compiled():
+    return CompiledStory.from_story(make_story())
+
+
+def test_validate_story_reports_every_problem():
+    story = make_story() + [{'stage': 'hall', 'options': [{'next': 'nowhere'}]}]
+    errors = validate_story(story)
+    assert 'Duplicate stage: hall' in errors
+
+    story = make_story()
+    story[1]['options'].append({'text': 'Jump', 'next': 'nowhere'})
+    assert validate_story(story) == ['Scene hall points to unknown stage: nowhere']
+    assert validate_story([]) == ['Story must be a non-empty list of scenes']
+
+
+def test_compile_story_rejects_invalid_story():
+    story = make_story()
+    story[0]['options'][0]['next'] = 'nowhere'
+    with pytest.raises(StoryCompileError) as excinfo:
+        compile_story(story)
+    assert excinfo.value.errors == ['Scene start_gate points to unknown stage: nowhere']
+
+
+def test_artifact_survives_a_json_round_trip(compiled):
+    artifact = json.loads(json.dumps(compile_story(make_story())))
+    reloaded = CompiledStory(artifact)
+    for stage in compiled.stages:
+        assert reloaded.hint(stage) == compiled.hint(stage)
+        assert reloaded.distance_to_ending(stage) == compiled.distance_to_ending(stage)
+
+
+def test_endings_distances_and_reachability(compiled):
+    assert compiled.endings == {'ending_good', 'ending_bad'}
+    assert compiled.starts == ('start_gate',)
+    assert compiled.distance_to_ending('start_gate') == 1
+    assert compiled.distance_to_ending('hall', 'ending_good') == 1
+    assert compiled.nearest_ending('hall') in compiled.endings
+    assert compiled.is_reachable('hall')
+    assert not compiled.is_reachable('attic')
+    assert compiled.can_reach('attic', 'ending_bad')
+    assert not compiled.can_reach('ending_good', 'hall')
+
+
+def test_is_ending_falls_back_to_the_naming_rule(compiled):
+    assert compiled.is_ending('ending_removed_scene')
+    assert not compiled.is_ending('hall')
+
+
+def test_hint_prefers_the_shortest_path(compiled):
+    assert compiled.hint('start_gate') == 1
+    assert compiled.hint('hall') in (0, 1)
+
+
+def test_hint_only_offers_options_the_player_can_take(compiled):
+    assert compiled.hint('start_gate', set()) == 0
+    assert compiled.hint('start_gate', {'Key'}) == 1
+
+
+def test_hint_skips_endings_with_and_without_items(compiled):
+    for ending in compiled.endings:
+        assert compiled.hint(ending) is None
+        assert compiled.hint(ending, set()) is None
+        assert compiled.hint(ending, {'Key'}) is None
+
+
+def test_required_items_and_unlocking_items(compiled):
+    assert compiled.required_items('hall') == frozenset()
+    assert compiled.required_items('ending_good') == frozenset()
+    assert compiled.required_items('attic') is None
+    assert compiled.unlocking_items('start_gate') == {'Key': 'ending_good'}
+
+
+def test_content_hash_and_fingerprint_ignore_order():
+    story = make_story()
+    scene = story[1]
+    reordered = {'options': scene['options'], 'description': scene['description'], 'stage': 'hall'}
+    assert scene_content_hash(scene) == scene_content_hash(reordered)
+    assert story_fingerprint(story) == story_fingerprint(list(reversed(story)))
+
+    changed = make_story()
+    changed[1]['description'] = 'A different hall.'
+    assert story_fingerprint(changed) != story_fingerprint(story)
@@ -0,0 +1,97 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from app.utils.story_compiler import CompiledStory, scene_content_hash
+from app.utils.story_seed import StoryValidationError, scene_changes, serialize_story, write_story_files
+
+NOW = datetime(2025, 8, 25, 12, 0, 0)
+
+STORY = [
+    {'stage': 'start_gate', 'description': 'A gate.', 'options': [{'text': 'In', 'next': 'hall'}]},
+    {'stage': 'hall', 'description': 'A hall.', 'options': [{'text': 'Out', 'next': 'ending_out'}]},
+    {'stage': 'ending_out', 'description': 'Outside.', 'options': []},
+]
+
+
+def seeded(story):
+    return {scene['stage']: scene_content_hash(scene) for scene in story}
+
+
+def test_unchanged_story_writes_nothing():
+    assert scene_changes(STORY, seeded(STORY), NOW) == ([], set())
+
+
+def test_only_new_and_changed_scenes_are_written():
+    story = [dict(scene) for scene in STORY]
+    story[1]['description'] = 'A longer hall.'
+    story.append({'stage': 'cellar', 'description': 'Dark.', 'options': []})
+
+    rows, retired = scene_changes(story, seeded(STORY), NOW)
+    assert [row['stage'] for row in rows] == ['hall', 'cellar']
+    assert retired == set()
+    assert rows[0]['content_hash'] == scene_content_hash(story[1])
+    assert rows[0]['created_at'] == NOW
+
+
+def test_scenes_missing_from_the_story_are_retired():
+    rows, retired = scene_changes(STORY[:2], seeded(STORY), NOW)
+    assert rows == []
+    assert retired == {'ending_out'}
+
+
+def test_first_seed_writes_every_scene():
+    rows, retired = scene_changes(STORY, {}, NOW)
+    assert len(rows) == len(STORY)
+    assert retired == set()
+
+
+def test_serialize_story_compiles_without_touching_disk():
+    raw, compiled_raw = serialize_story(STORY)
+    assert json.loads(raw) == STORY
+    assert CompiledStory(json.loads(compiled_raw)).endings == {'ending_out'}
+
+
+def test_serialize_story_rejects_invalid_story():
+    broken = [{'stage': 'start_gate', 'options': [{'text': 'In', 'next': 'nowhere'}]}]
+    with pytest.raises(StoryValidationError) as excinfo:
+        serialize_story(broken)
+    assert excinfo.value.status_code == 400
+    assert excinfo.value.details['errors'] == ['Scene start_gate points to unknown stage: nowhere']
+
+
+def test_write_story_files_replaces_both_files(tmp_path):
+    story_path, compiled_path = tmp_path / 'story.json', tmp_path / 'story.compiled.json'
+    story_path.write_text('[]')
+    raw, compiled_raw = serialize_story(STORY)
+
+    write_story_files(raw, compiled_raw, str(story_path), str(compiled_path))
+    assert story_path.read_bytes() == raw
+    assert compiled_path.read_bytes() == compiled_raw
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['story.compiled.json', 'story.json']
+
+
+def test_dropped_scenes_are_retired_and_revived_with_the_same_id(db_session, game_state):
+    from app.models import Scene
+    from app.utils.story_graph import get_story_graph, invalidate_story_graph
+    from app.utils.story_seed import seed_story
+
+    seed_story(STORY, 'v1')
+    invalidate_story_graph()
+    game_state.current_stage = 'ending_out'
+    db_session.commit()
+    scene_id = game_state.scene_id
+
+    without_ending = [STORY[0], dict(STORY[1], options=[{'text': 'Back', 'next': 'start_gate'}])]
+    assert seed_story(without_ending, 'v2').retired == 1
+    invalidate_story_graph()
+    assert 'ending_out' not in get_story_graph()
+    db_session.refresh(game_state)
+    assert game_state.scene_id == scene_id
+    assert game_state.current_stage == 'start'
+
+    seed_story(STORY, 'v3')
+    invalidate_story_graph()
+    assert Scene.query.filter_by(stage='ending_out').one().retired_at is None
+    assert game_state.current_stage == 'ending_out'
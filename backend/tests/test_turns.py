@@ -0,0 +1,92 @@
+import random
+
+import pytest
+
+from app.models import Character, GameEvent, Inventory
+from app.routes.game_routes import apply_stat_changes, locked_stage
+from app.utils.error_handling import ConflictError, NotFoundError
+
+
+@pytest.fixture
+def no_variance(monkeypatch):
+    monkeypatch.setattr(random, 'randint', lambda low, high: 0)
+
+
+def take_turn(client, auth_headers, choice_index, current=None):
+    body = {'choice_index': choice_index}
+    if current is not None:
+        body['current'] = current
+    return client.post('/api/game/turn', json=body, headers=auth_headers)
+
+
+def test_turn_applies_the_whole_choice(db_session, client, auth_headers, character, game_state, no_variance):
+    game_state.current_stage = 'start_subway'
+    character.fear = 10
+    db_session.commit()
+
+    response = take_turn(client, auth_headers, 0, current='start_subway')
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['game_ended'] is False
+    assert data['stat_changes'] == {'fear': -1, 'sanity': 0}
+    assert [item['item_name'] for item in data['inventory_delta']['added']] == ['Glowing Scale']
+    assert data['scene']['stage'] == 'subway_sleeping'
+    assert data['scene']['is_ending'] is False
+    db_session.refresh(game_state)
+    assert game_state.current_stage == 'subway_sleeping'
+    assert [(event.stage, event.next_stage) for event in GameEvent.query.all()] == [('start_subway', 'subway_sleeping')]
+
+
+def test_turn_from_a_stale_stage_is_a_conflict(db_session, client, auth_headers, character, game_state):
+    game_state.current_stage = 'start_subway'
+    db_session.commit()
+
+    response = take_turn(client, auth_headers, 0, current='wall_encounter')
+
+    assert response.status_code == 409
+    assert response.get_json()['details'] == {'current': 'start_subway', 'requested': 'wall_encounter'}
+    db_session.rollback()
+    assert game_state.current_stage == 'start_subway'
+    assert Inventory.unused(character.id) == []
+
+
+def test_turn_into_an_ending_resets_and_ends_the_game(db_session, client, auth_headers, character, game_state):
+    game_state.current_stage = 'deep_journey'
+    Inventory.add_by_name(character.id, 'Glowing Scale')
+    db_session.commit()
+
+    response = take_turn(client, auth_headers, 0)
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['game_ended'] is True
+    assert data['inventory_delta']['reset'] is True
+    assert data['scene']['is_ending'] is True
+    db_session.refresh(game_state)
+    assert game_state.ended_at is not None
+    assert Inventory.unused(character.id) == []
+
+
+def test_locked_stage_checks_the_claimed_stage(db_session, game_state):
+    game_state.current_stage = 'start_subway'
+    db_session.commit()
+
+    assert locked_stage(game_state, None) == 'start_subway'
+    assert locked_stage(game_state, 'start_subway') == 'start_subway'
+    with pytest.raises(ConflictError):
+        locked_stage(game_state, 'wall_encounter')
+    with pytest.raises(NotFoundError):
+        locked_stage(None, None)
+
+
+def test_apply_stat_changes_returns_the_clamped_deltas(db_session, character, no_variance):
+    character.fear, character.sanity = 95, 100
+    db_session.commit()
+
+    applied = apply_stat_changes(character, {'fear': 10, 'sanity': -30})
+    db_session.commit()
+
+    assert applied == {'fear': 5, 'sanity': -30}
+    assert db_session.get(Character, character.id).sanity == 70
+    assert apply_stat_changes(character, None) == {}
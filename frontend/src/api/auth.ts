@@ -47,6 +47,16 @@ export async function fetchCharacter() {
   return data;
 }
 
+// Fetch user, character, game state, inventory and current scene in one request
+export async function fetchSessionBootstrap() {
+  const [data, error] = await fetchHandler(
+    "/api/session/bootstrap?include=next",
+    basicFetchOptions()
+  );
+  if (error) throw error;
+  return data;
+}
+
 export async function updateCharacterStats(updates: {
   fear?: number;
   sanity?: number;
@@ -70,35 +80,80 @@ export async function deleteCharacter(characterId: number) {
 }
 
 export function logout() {
-  localStorage.removeItem("authToken");
+  clearToken();
 }
 
 export function getToken() {
   return localStorage.getItem("authToken");
 }
 
-// Validate token by calling the load endpoint
+// How long a successful introspection is trusted before asking the server again
+const TOKEN_RECHECK_MS = 60 * 1000;
+let verifiedToken: string | null = null;
+let verifiedUntil = 0;
+
+// Read the exp claim (seconds since epoch) from a JWT without verifying it
+function getTokenExpiry(token: string): number | null {
+  try {
+    const payload = token.split(".")[1];
+    const json = atob(payload.replace(/-/g, "+").replace(/_/g, "/"));
+    const { exp } = JSON.parse(json);
+    return typeof exp === "number" ? exp : null;
+  } catch {
+    return null;
+  }
+}
+
+function clearToken() {
+  localStorage.removeItem("authToken");
+  verifiedToken = null;
+  verifiedUntil = 0;
+}
+
+// Validate the token locally, only asking the server's introspect endpoint
+// when the last check is stale
 export async function validateToken(): Promise<boolean> {
   const token = getToken();
   if (!token) {
     return false;
   }
 
+  const now = Date.now();
+  const exp = getTokenExpiry(token);
+  if (exp !== null && exp * 1000 <= now) {
+    clearToken();
+    return false;
+  }
+
+  if (token === verifiedToken && now < verifiedUntil) {
+    return true;
+  }
+
   try {
-    const [, error] = await fetchHandler("/api/auth/load", basicFetchOptions());
+    const [data, error] = await fetchHandler(
+      "/api/auth/introspect",
+      basicFetchOptions()
+    );
 
-    if (error) {
-      // Token is invalid or expired
-      localStorage.removeItem("authToken");
+    if (error || !data?.active) {
+      // Token is invalid, expired or revoked
+      clearToken();
       return false;
     }
 
-    // Token is valid
+    // Token is valid; trust it until the recheck window or expiry, whichever is first
+    verifiedToken = token;
+    verifiedUntil =
+      now +
+      Math.min(
+        TOKEN_RECHECK_MS,
+        data.expires_in != null ? data.expires_in * 1000 : TOKEN_RECHECK_MS
+      );
     return true;
   } catch (error) {
     // Network error or server down
     console.error("Error validating token:", error);
-    localStorage.removeItem("authToken");
+    clearToken();
     return false;
   }
 }
@@ -6,6 +6,7 @@ import {
   getPutOptions,
   deleteOptions,
 } from "../utils/fetchHelpers";
+import type { InventoryOperation } from "../types";
 
 export async function fetchStoryStart() {
   try {
@@ -50,6 +51,21 @@ export async function postStoryChoice(current: string, choice_index: number) {
   }
 }
 
+// Apply a whole choice (stats, reward, history, ending cleanup) in one request
+export async function postStoryTurn(current: string, choice_index: number) {
+  try {
+    const [data, error] = await fetchHandler(
+      "/api/game/turn?include=next",
+      getPostOptions({ current, choice_index })
+    );
+    if (error) throw error;
+    return data;
+  } catch (error) {
+    console.error("Failed to post story turn:", error);
+    throw error;
+  }
+}
+
 // Use an item for story progression
 export async function triggerItemStoryProgression(
   current: string,
@@ -129,6 +145,21 @@ export async function consumeInventoryItem(item_id: number) {
   }
 }
 
+// Apply several inventory operations in one request and transaction
+export async function postInventoryBatch(operations: InventoryOperation[]) {
+  try {
+    const [data, error] = await fetchHandler(
+      "/api/inventory/batch",
+      getPostOptions({ operations })
+    );
+    if (error) throw error;
+    return data;
+  } catch (error) {
+    console.error("Failed to apply inventory batch:", error);
+    throw error;
+  }
+}
+
 export async function resetInventory() {
   try {
     const [data, error] = await fetchHandler(
@@ -34,6 +34,7 @@ const InventoryInfo: React.FC<InventoryInfoProps> = ({
                     }`}
                   >
                     {item.item_name}
+                    {(item.quantity ?? 1) > 1 && ` x${item.quantity}`}
                   </span>
                   {!item.used && (
                     <button
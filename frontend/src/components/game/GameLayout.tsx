@@ -16,6 +16,7 @@ function GameLayout() {
     node,
     error,
     gameEnded,
+    isLoading,
     canItemTriggerStory,
     canMakeChoice,
     getMissingItemsForChoice,
@@ -93,6 +94,7 @@ function GameLayout() {
               onChoice={handleChoice}
               canMakeChoice={canMakeChoice}
               getMissingItemsForChoice={getMissingItemsForChoice}
+              disabled={isLoading}
             />
           </div>
         </div>
@@ -6,6 +6,7 @@ interface StoryContentProps {
   onChoice: (choiceIndex: number) => void;
   canMakeChoice?: (choiceIndex: number) => boolean;
   getMissingItemsForChoice?: (choiceIndex: number) => string[];
+  disabled?: boolean;
 }
 
 const StoryContent: React.FC<StoryContentProps> = ({
@@ -13,6 +14,7 @@ const StoryContent: React.FC<StoryContentProps> = ({
   onChoice,
   canMakeChoice,
   getMissingItemsForChoice,
+  disabled = false,
 }) => {
   return (
     <>
@@ -28,7 +30,8 @@ const StoryContent: React.FC<StoryContentProps> = ({
           </div>
           <div className="space-y-2 mt-auto">
             {(node?.options || []).map((option: Option, idx: number) => {
-              const canMake = canMakeChoice ? canMakeChoice(idx) : true;
+              const canMake =
+                !disabled && (canMakeChoice ? canMakeChoice(idx) : true);
               const missingItems = getMissingItemsForChoice
                 ? getMissingItemsForChoice(idx)
                 : [];
@@ -11,6 +11,7 @@ interface SavedGameData {
   };
   inventory_snapshot?: Array<{
     item_name: string;
+    quantity?: number;
     used: boolean;
   }>;
   choice_history?: string[];
@@ -43,8 +44,11 @@ const SaveLoadControls: React.FC<SaveLoadControlsProps> = ({
         ...state,
         inventory_snapshot: state.inventory_snapshot.map((item) => ({
           item_name: item.item_name,
+          quantity: item.quantity,
           used: item.used,
         })),
+        // Explicit saves bypass the server's write-behind buffer
+        hard: true,
       };
       await saveGameState(apiState);
       setMessage("Game saved!");
@@ -83,6 +87,7 @@ const SaveLoadControls: React.FC<SaveLoadControlsProps> = ({
               id: 0, // We don't have the original ID, so use 0
               item_name: item.item_name,
               description: "",
+              quantity: item.quantity,
               used: item.used,
             })) || [],
         };
@@ -1,22 +1,20 @@
-import {
-  postStoryChoice,
-  fetchInventory,
-  resetInventory,
-  resetCharacter,
-  postInventoryItem,
-} from "../../api/storyFetch";
-import { updateCharacterStats, validateToken } from "../../api/auth";
-import type { InventoryItem, Character, StoryNode } from "../../types";
+import { useRef } from "react";
+import { postStoryTurn } from "../../api/storyFetch";
+import { validateToken } from "../../api/auth";
+import type {
+  InventoryItem,
+  Character,
+  StoryNode,
+  TurnResult,
+} from "../../types";
 import {
   handleApiError,
-  createGameError,
   getErrorMessage,
   logError,
   type ErrorContext,
 } from "../../utils/errorHandling";
 
 interface UseChoiceManagementProps {
-  character: Character | null;
   inventory: InventoryItem[];
   currentKey: string;
   node: StoryNode | null;
@@ -31,7 +29,6 @@ interface UseChoiceManagementProps {
 }
 
 export const useChoiceManagement = ({
-  character,
   inventory,
   currentKey,
   node,
@@ -44,6 +41,9 @@ export const useChoiceManagement = ({
   setIsLoading,
   isRestarting,
 }: UseChoiceManagementProps) => {
+  // Set while a turn request is pending so a second click can't race the first
+  const turnInFlight = useRef(false);
+
   // Helper function to check if a choice requires items and if the player has them
   const canMakeChoice = (choiceIndex: number) => {
     if (!node || !node.options || choiceIndex >= node.options.length)
@@ -52,6 +52,9 @@ export const useChoiceManagement = ({
     const option = node.options[choiceIndex];
     if (!option) return true;
 
+    // Prefer the server's availability annotation when present
+    if (option.available !== undefined) return option.available;
+
     // Check for single required item
     if (option.required_item) {
       const hasItem = inventory.some(
@@ -80,6 +83,8 @@ export const useChoiceManagement = ({
     const option = node.options[choiceIndex];
     if (!option) return [];
 
+    if (option.missing_items !== undefined) return option.missing_items;
+
     const missingItems = [];
 
     // Check for single required item
@@ -115,6 +120,10 @@ export const useChoiceManagement = ({
       additionalInfo: { choiceIndex, currentKey },
     };
 
+    if (turnInFlight.current) return;
+    turnInFlight.current = true;
+    setIsLoading(true);
+
     try {
       // Validate token before making choice
       const isValid = await validateToken();
@@ -123,127 +132,58 @@ export const useChoiceManagement = ({
         return;
       }
 
-      setIsLoading(true);
-      setError(null);
-      const data = await postStoryChoice(currentKey, choiceIndex);
-      if (data.error) {
-        const gameError = createGameError(data.error, context, data);
-        logError(gameError);
-        setError(getErrorMessage(gameError));
-        return;
+      // Show the prefetched next scene right away; the turn response replaces it.
+      // Endings wait for the server, which decides whether the game is over.
+      const previousNode = node;
+      const nextStage = node?.options?.[choiceIndex]?.next;
+      const candidate = nextStage ? node?.next_scenes?.[nextStage] : undefined;
+      const prefetched =
+        candidate && !candidate.is_ending ? candidate : undefined;
+      if (prefetched) {
+        setNode(prefetched);
+        setCurrentKey(prefetched.stage);
       }
+      setError(null);
 
-      const selectedOption = node?.options[choiceIndex];
-
-      // Update character stats if needed
-      if (selectedOption?.stat_changes && character) {
-        try {
-          // Add small random variation (±2 points)
-          const randomFear = Math.floor(Math.random() * 5) - 2; // -2 to +2
-          const randomSanity = Math.floor(Math.random() * 5) - 2; // -2 to +2
-
-          const newFear = Math.max(
-            0,
-            Math.min(
-              100,
-              (character.fear || 0) +
-                (selectedOption.stat_changes.fear || 0) +
-                randomFear
-            )
-          );
-          const newSanity = Math.max(
-            0,
-            Math.min(
-              100,
-              (character.sanity || 0) +
-                (selectedOption.stat_changes.sanity || 0) +
-                randomSanity
-            )
-          );
-
-          console.log("Fear calculation:", {
-            currentFear: character.fear,
-            statChange: selectedOption.stat_changes.fear,
-            randomVariation: randomFear,
-            newFear: newFear,
-          });
-
-          const updatedCharacter = await updateCharacterStats({
-            fear: newFear,
-            sanity: newSanity,
-          });
-          console.log("updatedCharacter", updatedCharacter);
-          setCharacter(updatedCharacter.character);
-        } catch (statsError) {
-          const gameError = handleApiError(statsError, {
-            ...context,
-            action: "update_character_stats",
-          });
-          logError(gameError);
-          // Don't fail the whole choice if stats update fails
-          console.warn(
-            "Failed to update character stats:",
-            getErrorMessage(gameError)
-          );
+      let data: TurnResult;
+      try {
+        data = await postStoryTurn(currentKey, choiceIndex);
+      } catch (turnError) {
+        // The server rejected the move, so go back to the scene we came from
+        if (prefetched && previousNode) {
+          setNode(previousNode);
+          setCurrentKey(previousNode.stage);
         }
+        throw turnError;
       }
 
-      // Add reward to inventory if needed
-      if (selectedOption?.reward && character) {
-        try {
-          await postInventoryItem(
-            selectedOption.reward,
-            "Reward from story choice"
-          );
-          const updatedInventory = await fetchInventory();
-          setInventory(updatedInventory.inventory);
-        } catch (inventoryError) {
-          const gameError = handleApiError(inventoryError, {
-            ...context,
-            action: "add_inventory_item",
-          });
-          logError(gameError);
-          // Don't fail the whole choice if inventory update fails
-          console.warn(
-            "Failed to add inventory item:",
-            getErrorMessage(gameError)
-          );
-        }
+      // The server applies stats, rewards and ending cleanup in one transaction
+      setCharacter(data.character);
+      if (data.inventory_delta.reset) {
+        setInventory([]);
+      } else if (data.inventory_delta.added.length > 0) {
+        // Rewards come back as whole stacks, so replace a stack we already hold
+        const addedIds = new Set(data.inventory_delta.added.map((item) => item.id));
+        setInventory([
+          ...inventory.filter((item) => !addedIds.has(item.id)),
+          ...data.inventory_delta.added,
+        ]);
       }
 
-      // Update the story node
-      setNode(data);
-      if (data && data.stage) {
-        setCurrentKey(data.stage);
+      setNode(data.scene);
+      if (data.scene && data.scene.stage) {
+        setCurrentKey(data.scene.stage);
       }
 
-      // Check for ending
-      if (
-        data.stage &&
-        data.stage.startsWith("ending") &&
-        character &&
-        !isRestarting
-      ) {
-        try {
-          await resetInventory();
-          await resetCharacter();
-          setInventory([]);
-          setGameEnded(true);
-        } catch (endingError) {
-          const gameError = handleApiError(endingError, {
-            ...context,
-            action: "handle_ending",
-          });
-          logError(gameError);
-          // Still set game ended even if cleanup fails
-          setGameEnded(true);
-        }
+      if (data.game_ended && !isRestarting) {
+        setGameEnded(true);
       }
     } catch (error) {
       const gameError = handleApiError(error, context);
       logError(gameError);
       setError(getErrorMessage(gameError));
     } finally {
+      turnInFlight.current = false;
       setIsLoading(false);
     }
   };
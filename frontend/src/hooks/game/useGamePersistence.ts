@@ -1,9 +1,37 @@
 import {
   fetchSceneByStage,
+  postInventoryBatch,
   resetInventory,
   resetCharacter,
 } from "../../api/storyFetch";
-import type { GameState, Character } from "../../types";
+import type {
+  GameState,
+  Character,
+  InventoryItem,
+  InventoryOperation,
+  InventoryBatchResult,
+} from "../../types";
+
+// Operations that replace the server inventory with a saved snapshot
+const restoreOperations = (snapshot: InventoryItem[]): InventoryOperation[] => [
+  { op: "reset" },
+  ...snapshot.map(
+    (item): InventoryOperation => ({
+      op: "add",
+      item_name: item.item_name,
+      quantity: item.quantity,
+    })
+  ),
+  ...snapshot
+    .filter((item) => item.used)
+    .map(
+      (item): InventoryOperation => ({
+        op: "use",
+        item_name: item.item_name,
+        quantity: item.quantity,
+      })
+    ),
+];
 
 interface UseGamePersistenceProps {
   currentKey: string;
@@ -56,7 +84,12 @@ export const useGamePersistence = ({
     }
 
     if (data.inventory_snapshot) {
-      setInventory(data.inventory_snapshot);
+      // Rebuild the server inventory in one request; after the reset the
+      // updated stacks are the whole inventory
+      const result: InventoryBatchResult = await postInventoryBatch(
+        restoreOperations(data.inventory_snapshot)
+      );
+      setInventory(result.inventory_delta.updated);
     }
 
     // Fetch the story node for the loaded stage
@@ -66,11 +99,7 @@ export const useGamePersistence = ({
         setNode(sceneData);
 
         // Check if the loaded stage is an ending
-        if (
-          data.current_stage.startsWith("ending") &&
-          character &&
-          !isRestarting
-        ) {
+        if (sceneData.is_ending && character && !isRestarting) {
           await resetInventory();
           await resetCharacter();
           setInventory([]);
@@ -2,11 +2,10 @@ import { useState, useEffect } from "react";
 import { useNavigate } from "react-router-dom";
 import {
   fetchStoryStart,
-  fetchInventory,
   resetInventory,
   resetCharacter,
 } from "../../api/storyFetch";
-import { fetchCharacter } from "../../api/auth";
+import { fetchSessionBootstrap } from "../../api/auth";
 import type { InventoryItem, Character, StoryNode } from "../../types";
 import { useChoiceManagement } from "./useChoiceManagement";
 import { useInventoryManagement } from "./useInventoryManagement";
@@ -26,7 +25,6 @@ export const useGameState = () => {
 
   // Initialize specialized hooks
   const choiceManagement = useChoiceManagement({
-    character,
     inventory,
     currentKey,
     node,
@@ -77,15 +75,17 @@ export const useGameState = () => {
     isRestarting,
   });
 
-  // Load the character on mount (AuthGuard ensures user is authenticated)
+  // Load character, inventory and current scene on mount (AuthGuard ensures user is authenticated)
   useEffect(() => {
     const initializeGame = async () => {
       try {
-        const characterData = await fetchCharacter();
-        setCharacter(characterData.character);
-
-        const inventoryData = await fetchInventory();
-        setInventory(inventoryData.inventory);
+        const sessionData = await fetchSessionBootstrap();
+        setInventory(sessionData.inventory);
+        if (sessionData.current_scene) {
+          setNode(sessionData.current_scene);
+          setCurrentKey(sessionData.current_scene.stage);
+        }
+        setCharacter(sessionData.character);
       } catch (error) {
         console.error("Failed to load character or inventory:", error);
         setError("Failed to load character or inventory.");
@@ -97,13 +97,6 @@ export const useGameState = () => {
     initializeGame();
   }, [navigate]);
 
-  // Load the inventory on mount
-  useEffect(() => {
-    if (character) {
-      fetchInventory().then((inv) => setInventory(inv.inventory));
-    }
-  }, [character]);
-
   // Load the first node after character is loaded
   useEffect(() => {
     const loadInitialStory = async () => {
@@ -116,12 +109,7 @@ export const useGameState = () => {
             setCurrentKey(data.current_scene.stage);
 
             // Check if the initial stage is an ending
-            if (
-              data.current_scene.stage &&
-              data.current_scene.stage.startsWith("ending") &&
-              character &&
-              !isRestarting
-            ) {
+            if (data.current_scene.is_ending && character && !isRestarting) {
               await resetInventory();
               await resetCharacter();
               setInventory([]);
@@ -139,27 +127,6 @@ export const useGameState = () => {
     loadInitialStory();
   }, [character, node, isRestarting]);
 
-  // Check for ending stages when node changes
-  useEffect(() => {
-    const checkForEnding = async () => {
-      if (
-        node &&
-        node.stage &&
-        node.stage.startsWith("ending") &&
-        character &&
-        !isRestarting
-      ) {
-        // Reset inventory and character for ending
-        await resetInventory();
-        await resetCharacter();
-        setInventory([]);
-        setGameEnded(true);
-      }
-    };
-
-    checkForEnding();
-  }, [node, character, isRestarting]);
-
   return {
     // State
     character,
@@ -110,12 +110,9 @@ export const useInventoryManagement = ({
         setError(null); // Clear any previous errors
 
         // Check for ending stages after item-triggered story progression
-        if (
-          storyResponse.node.stage &&
-          storyResponse.node.stage.startsWith("ending") &&
-          character &&
-          !isRestarting
-        ) {
+        const reachedEnding =
+          storyResponse.game_ended ?? storyResponse.node.is_ending;
+        if (reachedEnding && character && !isRestarting) {
           try {
             await resetInventory();
             await resetCharacter();
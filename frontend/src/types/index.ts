@@ -2,6 +2,7 @@ export interface InventoryItem {
   id: number;
   item_name: string;
   description: string;
+  quantity?: number;
   used: boolean;
 }
 
@@ -21,6 +22,9 @@ export interface Option {
   consume_item?: boolean;
   required_item?: string;
   required_items?: string[];
+  // Annotated by the server against the player's unused inventory
+  available?: boolean;
+  missing_items?: string[];
 }
 
 export interface StoryNode {
@@ -34,6 +38,34 @@ export interface StoryNode {
     message: string;
   }>;
   created_at?: string;
+  // Set by the server for ending scenes
+  is_ending: boolean;
+  // Scenes one hop away, keyed by stage (requested with include=next)
+  next_scenes?: Record<string, StoryNode>;
+}
+
+export interface TurnResult {
+  scene: StoryNode;
+  character: Character;
+  stat_changes: { fear?: number; sanity?: number };
+  inventory_delta: {
+    added: InventoryItem[];
+    reset: boolean;
+  };
+  game_ended: boolean;
+}
+
+export type InventoryOperation =
+  | { op: "add"; item_name: string; quantity?: number }
+  | { op: "use" | "remove"; id?: number; item_name?: string; quantity?: number }
+  | { op: "reset" };
+
+export interface InventoryBatchResult {
+  inventory_delta: {
+    updated: InventoryItem[];
+    removed: number[];
+    reset: boolean;
+  };
 }
 
 export interface GameState {